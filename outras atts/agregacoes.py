@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Visões materializadas de métricas descritivas. Cada visão (produto, cliente, transação,
+# dia, ...) guarda por chave a contagem de linhas e, para cada medida, soma e soma dos
+# quadrados, calculadas num único groupby por visão. Média, desvio padrão e top-k são
+# derivados dessas colunas; novos dados são somados às visões com atualizar(), sem
+# reprocessar o histórico.
+
+ESTATISTICAS = ('soma', 'contagem', 'media', 'desvio')
+
+
+class VisoesAgregadas:
+    def __init__(self, dimensoes, medidas):
+        # dimensoes: nome da visão -> coluna chave; colunas datetime são agregadas por dia
+        self.dimensoes = dict(dimensoes)
+        self.medidas = list(medidas)
+        self.linhas = 0
+        self._inteiras = set()
+        self._visoes = {nome: None for nome in self.dimensoes}
+
+    def _colunas_parciais(self, df):
+        parcial = {}
+        for medida in self.medidas:
+            valores = df[medida].astype('float64')
+            parcial[f'{medida}_soma'] = valores
+            parcial[f'{medida}_quadrados'] = valores * valores
+        return pd.DataFrame(parcial, index=df.index)
+
+    def atualizar(self, df):
+        if len(df) == 0:
+            return self
+        self._inteiras.update(m for m in self.medidas if pd.api.types.is_integer_dtype(df[m]))
+        parcial = self._colunas_parciais(df)
+        parcial['contagem'] = 1.0
+
+        for nome, coluna in self.dimensoes.items():
+            chave = df[coluna]
+            if pd.api.types.is_datetime64_any_dtype(chave):
+                chave = chave.dt.floor('D')
+            agregado = parcial.groupby(chave.rename(coluna), observed=True, sort=True).sum()
+            atual = self._visoes[nome]
+            self._visoes[nome] = agregado if atual is None else atual.add(agregado, fill_value=0).sort_index()
+
+        self.linhas += len(df)
+        return self
+
+    def serie(self, dimensao, medida, estatistica='soma'):
+        if estatistica not in ESTATISTICAS:
+            raise ValueError(f"Estatística não suportada: {estatistica}")
+        visao = self._visoes[dimensao]
+        if visao is None:
+            return pd.Series(dtype='float64', name=medida)
+        contagem = visao['contagem']
+        if estatistica == 'contagem':
+            return contagem.astype('int64').rename(medida)
+
+        soma = visao[f'{medida}_soma']
+        if estatistica == 'soma':
+            return (soma.round().astype('int64') if medida in self._inteiras else soma).rename(medida)
+        if estatistica == 'media':
+            return (soma / contagem).rename(medida)
+        # desvio padrão amostral (ddof=1), como pandas
+        variancia = (visao[f'{medida}_quadrados'] - soma * soma / contagem) / (contagem - 1)
+        return np.sqrt(variancia.clip(lower=0)).where(contagem > 1).rename(medida)
+
+    def top(self, dimensao, medida, k=5, estatistica='soma'):
+        return self.serie(dimensao, medida, estatistica).nlargest(k)
+
+    def visao(self, dimensao):
+        colunas = {'linhas': self.serie(dimensao, self.medidas[0], 'contagem')}
+        for medida in self.medidas:
+            for estatistica in ('soma', 'media', 'desvio'):
+                colunas[f'{medida}_{estatistica}'] = self.serie(dimensao, medida, estatistica)
+        return pd.DataFrame(colunas)
@@ -1,8 +1,12 @@
 import pandas as pd
-from mlxtend.frequent_patterns import apriori, association_rules
+from mineracao import minerar_regras
+from cache_resultados import CacheResultados
+from matriz_cesta import montar_cesta
 import matplotlib.pyplot as plt
 import numpy as np
 
+ALGORITMO = 'apriori'  # ou 'fpgrowth': mesmos itemsets, menos memória em suportes baixos, outra ordem de linhas
+
 # Dados da simulação
 data = {
     'ProdutoID': [
@@ -26,18 +30,11 @@ data = {
 df = pd.DataFrame(data)
 
 # Transformar em matriz binária (cesta)
-cesta = df.pivot_table(
-    index='ProdutoID',
-    columns='Produto',
-    aggfunc=lambda x: 1,
-    fill_value=0
-)
-
-# Apriori com suporte reduzido
-frequencia_item = apriori(cesta, min_support=0.03, use_colnames=True)
+cesta = montar_cesta(df, 'ProdutoID', 'Produto')
 
-# Regras com confidence mínimo acima de 0.7
-regras = association_rules(frequencia_item, metric="confidence", min_threshold=0.7)
+# Itemsets frequentes com suporte reduzido e regras com confidence mínimo acima de 0.7;
+# numa nova execução com os mesmos dados, o resultado vem do cache em disco
+regras = minerar_regras(cesta, min_support=0.03, min_confidence=0.7, algorithm=ALGORITMO, cache=CacheResultados())
 
 # Exportar para CSV
 regras.to_csv("regras_mercado.csv", index=False)
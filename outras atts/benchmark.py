@@ -0,0 +1,300 @@
+import argparse
+import ast
+import json
+import math
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import association_rules
+
+from cestas_bitset import CestasBitset
+from gerador_transacoes import catalogo, gerar_bloco
+from indice_invertido import IndiceInvertido
+from jaccard_app import calcular_similaridades, recomendar_produtos
+from matriz_cesta import codificar_cestas, montar_cesta
+from mineracao import minerar_itemsets
+
+# Benchmark reprodutível das implementações de mineração, similaridade e recomendação.
+# Para cada escala (número de transações) gera um dataset sintético com semente fixa,
+# confere que todas as implementações produzem os mesmos itemsets e regras e só então
+# mede cada uma em um processo filho (tempo de parede e pico de RSS). O resultado vai
+# para um JSON que pode ser comparado com o de outro commit via --comparar.
+
+NOTEBOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Projeto_MiniMercado.ipynb')
+
+INTERVALO_CONSULTA = 1.0
+
+_dados = {}
+
+
+def funcoes_notebook(caminho=NOTEBOOK):
+    # executa só imports e definições (def/class) das células de código do notebook
+    with open(caminho, encoding='utf-8') as f:
+        celulas = json.load(f)['cells']
+    namespace = {'np': np, 'pd': pd}
+    for celula in celulas:
+        if celula['cell_type'] != 'code':
+            continue
+        arvore = ast.parse(''.join(celula['source']))
+        definicoes = [n for n in arvore.body if isinstance(n, (ast.FunctionDef, ast.ClassDef))]
+        if not definicoes:
+            continue
+        imports = [n for n in arvore.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+        exec(compile(ast.Module(body=imports + definicoes, type_ignores=[]), 'notebook', 'exec'), namespace)
+    return namespace
+
+
+def gerar_dataset(n_transacoes, seed=42):
+    produtos, precos = catalogo(200, seed)
+    n_clientes = max(50, n_transacoes // 20)
+    rng = np.random.default_rng([seed, n_transacoes])
+    return gerar_bloco(rng, 1, n_transacoes, produtos, precos, n_clientes, zipf=1.2)
+
+
+def _itemsets_mlxtend(frequentes):
+    return dict(zip(frequentes['itemsets'], frequentes['support']))
+
+
+def _regras_notebook(regras):
+    return {(regras.antecedent(r), regras.consequent(r)): regras.confidence[r] for r in range(len(regras))}
+
+
+def _regras_mlxtend(regras):
+    return dict(zip(zip(regras['antecedents'], regras['consequents']), regras['confidence']))
+
+
+def _iguais(a, b):
+    return a.keys() == b.keys() and all(math.isclose(a[k], b[k], rel_tol=1e-9) for k in a)
+
+
+def implementacoes_mineracao(nb):
+    return {
+        'notebook_apriori': lambda d, s: nb['find_frequent_itemsets'](d['transacoes'], s, algorithm='apriori'),
+        'notebook_fpgrowth': lambda d, s: nb['find_frequent_itemsets'](d['transacoes'], s, algorithm='fpgrowth'),
+        'mlxtend_apriori': lambda d, s: _itemsets_mlxtend(minerar_itemsets(d['cesta'], s, algorithm='apriori')),
+        'mlxtend_fpgrowth': lambda d, s: _itemsets_mlxtend(minerar_itemsets(d['cesta'], s, algorithm='fpgrowth')),
+    }
+
+
+def implementacoes_regras(nb, confianca):
+    return {
+        'notebook_generate_rules': lambda d, s: _regras_notebook(
+            nb['generate_rules'](d['itemsets'][s], min_confidence=confianca)),
+        'mlxtend_association_rules': lambda d, s: _regras_mlxtend(
+            association_rules(d['frequentes'][s], metric='confidence', min_threshold=confianca)),
+    }
+
+
+def implementacoes_similaridade(nb, amostra_recomendacao):
+    return {
+        'jaccard_app_calcular_similaridades': lambda d, _: _pares_dataframe(calcular_similaridades(d['cestas'])),
+        'notebook_jaccard_sparse': lambda d, _: _pares_esparsos(nb['jaccard_sparse'](d['matriz_clientes']), d['clientes']),
+        'recomendar_produtos_indice': lambda d, _: _recomendar_amostra(d, amostra_recomendacao),
+    }
+
+
+def _pares_esparsos(similaridade, clientes):
+    coo = similaridade.tocoo()
+    return {
+        frozenset((clientes[i], clientes[j])): s
+        for i, j, s in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist()) if i < j
+    }
+
+
+def _pares_dataframe(similaridades):
+    positivos = similaridades[similaridades['similaridade'] > 0]
+    return {
+        frozenset((c1, c2)): s
+        for c1, c2, s in zip(positivos['cliente1'], positivos['cliente2'], positivos['similaridade'].tolist())
+    }
+
+
+def _recomendar_amostra(d, amostra):
+    indice = IndiceInvertido(d['cestas'])
+    return {c: recomendar_produtos(c, d['cestas'], indice=indice) for c in d['cestas'].clientes[:amostra]}
+
+
+def _rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _executar_filho(fila, funcao, suporte):
+    try:
+        rss_inicial = _rss_kb()
+        inicio = time.perf_counter()
+        resultado = funcao(_dados, suporte)
+        segundos = time.perf_counter() - inicio
+        fila.put(('ok', (segundos, _rss_kb(), _rss_kb() - rss_inicial, len(resultado))))
+    except Exception as erro:
+        fila.put(('erro', f"{type(erro).__name__}: {erro}"))
+
+
+def _falha(motivo):
+    return {'segundos': None, 'pico_rss_kb': None, 'delta_rss_kb': None, 'resultados': None, 'erro': motivo}
+
+
+def medir(funcao, suporte):
+    # processo filho (fork) herda o dataset; o pico de RSS de cada medição fica isolado.
+    # A fila é consultada com timeout enquanto o filho vive, para que um filho que morre
+    # sem responder (OOM killer, sinal, os._exit) vire uma falha e não trave a suíte.
+    contexto = multiprocessing.get_context('fork')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_filho, args=(fila, funcao, suporte))
+    processo.start()
+    mensagem = None
+    while mensagem is None:
+        try:
+            mensagem = fila.get(timeout=INTERVALO_CONSULTA)
+        except queue.Empty:
+            if not processo.is_alive():
+                # o filho pode ter respondido logo antes de sair
+                try:
+                    mensagem = fila.get(timeout=INTERVALO_CONSULTA)
+                except queue.Empty:
+                    break
+    processo.join()
+
+    if mensagem is None:
+        return _falha(f"processo filho terminou sem resultado (exit code {processo.exitcode})")
+    status, conteudo = mensagem
+    if status == 'erro':
+        return _falha(conteudo)
+    if processo.exitcode != 0:
+        return _falha(f"exit code {processo.exitcode}")
+    segundos, pico_rss_kb, delta_rss_kb, quantidade = conteudo
+    return {'segundos': segundos, 'pico_rss_kb': pico_rss_kb, 'delta_rss_kb': delta_rss_kb, 'resultados': quantidade}
+
+
+def _descrever(medida):
+    if 'erro' in medida:
+        return f"FALHOU: {medida['erro']}"
+    return f"{medida['segundos']:9.3f}s {medida['pico_rss_kb'] / 1024:9.1f} MB  {medida['resultados']} resultados"
+
+
+def preparar(n_transacoes, seed, max_clientes):
+    vendas = gerar_dataset(n_transacoes, seed)
+    cesta = montar_cesta(vendas, 'IDTransacao', 'NomeProduto')
+    transacoes = vendas.groupby('IDTransacao', observed=True)['NomeProduto'].apply(list).tolist()
+
+    clientes_amostra = vendas['IDCliente'].cat.categories[:max_clientes]
+    vendas_clientes = vendas[vendas['IDCliente'].isin(clientes_amostra)]
+    vendas_clientes = vendas_clientes.assign(IDCliente=vendas_clientes['IDCliente'].astype(str))
+    matriz, clientes, produtos = codificar_cestas(vendas_clientes, 'IDCliente', 'NomeProduto')
+    cestas = CestasBitset.de_csr(matriz.indptr, matriz.indices, list(clientes), [str(p) for p in produtos])
+
+    _dados.clear()
+    _dados.update({
+        'transacoes': transacoes, 'cesta': cesta, 'cestas': cestas,
+        'matriz_clientes': matriz, 'clientes': list(clientes),
+        'itemsets': {}, 'frequentes': {}
+    })
+    return len(vendas)
+
+
+def verificar(implementacoes, suporte, chave):
+    resultados = {nome: funcao(_dados, suporte) for nome, funcao in implementacoes.items()}
+    referencia_nome, referencia = next(iter(resultados.items()))
+    for nome, resultado in resultados.items():
+        if not _iguais(referencia, resultado):
+            raise AssertionError(f"{nome} difere de {referencia_nome} ({chave}, suporte={suporte})")
+    return referencia
+
+
+def executar(escalas, suportes, confianca, seed, max_clientes, amostra_recomendacao):
+    nb = funcoes_notebook()
+    registros = []
+
+    for escala in escalas:
+        linhas = preparar(escala, seed, max_clientes)
+        print(f"\nESCALA: {escala} transações ({linhas} linhas)")
+
+        for suporte in suportes:
+            mineracao = implementacoes_mineracao(nb)
+            itemsets = verificar(mineracao, suporte, 'itemsets')
+            _dados['itemsets'][suporte] = itemsets
+            _dados['frequentes'][suporte] = minerar_itemsets(_dados['cesta'], suporte, algorithm='fpgrowth')
+            regras = implementacoes_regras(nb, confianca)
+            verificar(regras, suporte, 'regras')
+
+            for etapa, implementacoes in (('mineracao', mineracao), ('regras', regras)):
+                for nome, funcao in implementacoes.items():
+                    medida = medir(funcao, suporte)
+                    registros.append({'escala': escala, 'suporte': suporte, 'etapa': etapa, 'implementacao': nome, **medida})
+                    print(f"  suporte={suporte:<6} {etapa:<12} {nome:<36} {_descrever(medida)}")
+
+        similaridade = implementacoes_similaridade(nb, amostra_recomendacao)
+        verificar({k: v for k, v in similaridade.items() if k != 'recomendar_produtos_indice'}, None, 'similaridade')
+        for nome, funcao in similaridade.items():
+            medida = medir(funcao, None)
+            registros.append({'escala': escala, 'suporte': None, 'etapa': 'similaridade', 'implementacao': nome, **medida})
+            print(f"  {'':<14} {'similaridade':<12} {nome:<36} {_descrever(medida)}")
+
+    return registros
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(antigo, novo, tolerancia=0.10):
+    # compara dois JSONs de benchmark e lista regressões de tempo acima da tolerância
+    with open(antigo) as f:
+        base = {(r['escala'], r['suporte'], r['etapa'], r['implementacao']): r for r in json.load(f)['resultados']}
+    with open(novo) as f:
+        atual = json.load(f)['resultados']
+    for r in atual:
+        chave = (r['escala'], r['suporte'], r['etapa'], r['implementacao'])
+        if chave not in base or r['segundos'] is None or base[chave]['segundos'] is None:
+            continue
+        anterior = base[chave]['segundos']
+        variacao = (r['segundos'] - anterior) / anterior if anterior > 0 else 0.0
+        marca = 'REGRESSÃO' if variacao > tolerancia else ''
+        print(f"{r['implementacao']:<36} escala={r['escala']:<9} suporte={r['suporte']} "
+              f"{anterior:8.3f}s -> {r['segundos']:8.3f}s ({variacao:+.1%}) {marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de mineração, similaridade e recomendação')
+    parser.add_argument('--escalas', default='1000,10000,100000', help='Números de transações separados por vírgula')
+    parser.add_argument('--suportes', default='0.05,0.02,0.01', help='Suportes mínimos separados por vírgula')
+    parser.add_argument('--confianca', type=float, default=0.25, help='Confiança mínima das regras')
+    parser.add_argument('--max-clientes', type=int, default=2000, help='Clientes usados nas etapas de similaridade')
+    parser.add_argument('--amostra-recomendacao', type=int, default=100, help='Clientes consultados em recomendar_produtos')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default='benchmark.json', help='Arquivo JSON de resultados')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTIGO', 'NOVO'), help='Comparar dois JSONs de benchmark')
+
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    escalas = [int(float(e)) for e in args.escalas.split(',')]
+    suportes = [float(s) for s in args.suportes.split(',')]
+    registros = executar(escalas, suportes, args.confianca, args.seed, args.max_clientes, args.amostra_recomendacao)
+
+    with open(args.saida, 'w') as f:
+        json.dump({
+            'commit': _commit_atual(),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'parametros': vars(args),
+            'resultados': registros
+        }, f, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
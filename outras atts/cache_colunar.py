@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+# Cache colunar dos CSVs de entrada: na primeira leitura o CSV é convertido para Arrow IPC
+# (Feather sem compressão, com as colunas de texto indicadas como categóricas); nas
+# seguintes o arquivo é aberto por memory-map. A validade é conferida pelo tamanho e
+# mtime do CSV; se só o mtime mudou, o hash SHA-256 do conteúdo decide.
+
+PASTA_CACHE = '.cache'
+
+
+def _hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _caminhos_cache(caminho, sufixo):
+    pasta = os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA_CACHE)
+    os.makedirs(pasta, exist_ok=True)
+    base = os.path.join(pasta, os.path.basename(caminho) + sufixo)
+    return base, base + '.json'
+
+
+def _cache_valido(caminho, arquivo_meta, opcoes):
+    if not os.path.exists(arquivo_meta):
+        return False
+    with open(arquivo_meta) as f:
+        meta = json.load(f)
+    estado = os.stat(caminho)
+    if meta.get('opcoes') != opcoes or meta.get('tamanho') != estado.st_size:
+        return False
+    if meta.get('mtime_ns') == estado.st_mtime_ns:
+        return True
+    if meta.get('sha256') != _hash_arquivo(caminho):
+        return False
+    # conteúdo igual (arquivo apenas tocado): atualiza o mtime para não refazer o hash
+    meta['mtime_ns'] = estado.st_mtime_ns
+    _gravar_meta(arquivo_meta, meta)
+    return True
+
+
+def _gravar_meta(arquivo_meta, meta):
+    temporario = arquivo_meta + '.tmp'
+    with open(temporario, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temporario, arquivo_meta)
+
+
+def _nova_meta(caminho, opcoes):
+    estado = os.stat(caminho)
+    return {
+        'tamanho': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+        'sha256': _hash_arquivo(caminho),
+        'opcoes': opcoes
+    }
+
+
+def ler_csv(caminho, categorias=(), **opcoes_leitura):
+    arquivo, arquivo_meta = _caminhos_cache(caminho, '.arrow')
+    opcoes = {'categorias': list(categorias), 'leitura': repr(sorted(opcoes_leitura.items()))}
+
+    if not _cache_valido(caminho, arquivo_meta, opcoes):
+        meta = _nova_meta(caminho, opcoes)
+        df = pd.read_csv(caminho, **opcoes_leitura)
+        for coluna in categorias:
+            df[coluna] = df[coluna].astype('category')
+        # sem compressão para que a leitura possa usar memory-map
+        feather.write_feather(df, arquivo + '.tmp', compression='uncompressed')
+        os.replace(arquivo + '.tmp', arquivo)
+        _gravar_meta(arquivo_meta, meta)
+
+    return feather.read_table(arquivo, memory_map=True).to_pandas()
+
+
+def _carregar_csr(caminho, col_cliente, col_produto):
+    # forma compacta do mapeamento cliente -> produtos: CSR (indptr/indices em .npy) + nomes
+    base, arquivo_meta = _caminhos_cache(caminho, f'.{col_cliente}.{col_produto}')
+    opcoes = {'colunas': [col_cliente, col_produto]}
+
+    if not _cache_valido(caminho, arquivo_meta, opcoes):
+        meta = _nova_meta(caminho, opcoes)
+        # scipy (via matriz_cesta) só é carregado quando o cache precisa ser refeito
+        from matriz_cesta import codificar_cestas
+        df = ler_csv(caminho, categorias=[col_cliente, col_produto])
+        matriz, clientes, produtos = codificar_cestas(df, col_cliente, col_produto)
+        np.save(base + '.indptr.npy', matriz.indptr.astype(np.int64))
+        np.save(base + '.indices.npy', matriz.indices.astype(np.int32))
+        with open(base + '.nomes.json', 'w') as f:
+            json.dump({'clientes': clientes.tolist(), 'produtos': produtos.tolist()}, f)
+        _gravar_meta(arquivo_meta, meta)
+
+    indptr = np.load(base + '.indptr.npy', mmap_mode='r')
+    indices = np.load(base + '.indices.npy', mmap_mode='r')
+    with open(base + '.nomes.json') as f:
+        nomes = json.load(f)
+    return indptr, indices, nomes['clientes'], nomes['produtos']
+
+
+def carregar_cestas_bitset(caminho, col_cliente, col_produto):
+    # cestas por cliente como bitsets uint64, montados direto do CSR em cache
+    from cestas_bitset import CestasBitset
+    return CestasBitset.de_csr(*_carregar_csr(caminho, col_cliente, col_produto))
@@ -0,0 +1,200 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Cache em disco de resultados caros (itemsets frequentes, regras, top-k de pares).
+# A chave é a impressão digital dos dados de entrada (SHA-256 da cesta ou das cestas por cliente)
+# mais os parâmetros. Um pedido com limiar mais estrito é respondido filtrando um
+# resultado guardado com limiar mais frouxo: itemsets com suporte >= s' contêm os de
+# suporte >= s > s', regras idem para confiança, e o top-k' contém o top-k para k <= k'.
+# O índice (indice.json) guarda tamanho e parâmetros de cada entrada; o último acesso é o
+# mtime do .pkl (um acerto só toca o arquivo, sem regravar o índice). Ao passar do limite
+# de tamanho, as entradas usadas há mais tempo são removidas (LRU). As gravações do índice
+# acontecem sob flock num arquivo ao lado (indice.lock), e .pkl que não constam no índice
+# (de uma execução interrompida) são apagados na gravação seguinte.
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'resultados')
+LIMITE_MB = 256
+
+
+def digital_cesta(cesta):
+    from matriz_cesta import matriz_csr
+    matriz = matriz_csr(cesta)
+    sha = hashlib.sha256()
+    sha.update(json.dumps([str(c) for c in cesta.columns]).encode())
+    sha.update(np.asarray(matriz.shape, dtype=np.int64).tobytes())
+    sha.update(matriz.indptr.astype(np.int64).tobytes())
+    sha.update(matriz.indices.astype(np.int64).tobytes())
+    return sha.hexdigest()
+
+
+def digital_cestas(cestas):
+    # CestasBitset: nomes de clientes e produtos + as palavras dos bitsets
+    sha = hashlib.sha256()
+    sha.update(json.dumps([[str(c) for c in cestas.clientes], [str(p) for p in cestas.produtos]]).encode())
+    sha.update(cestas.bits.astype('<u8').tobytes())
+    return sha.hexdigest()
+
+
+def _cobre_max_len(guardado, pedido):
+    return guardado is None or (pedido is not None and pedido <= guardado)
+
+
+def _filtrar_itemsets(itemsets, parametros):
+    filtro = itemsets['support'] >= parametros['min_support']
+    if parametros.get('max_len') is not None:
+        filtro &= itemsets['itemsets'].map(len) <= parametros['max_len']
+    return itemsets[filtro].reset_index(drop=True)
+
+
+def _filtrar_regras(regras, parametros):
+    filtro = (regras['support'] >= parametros['min_support']) & (regras['confidence'] >= parametros['min_confidence'])
+    if parametros.get('max_len') is not None:
+        filtro &= (regras['antecedents'].map(len) + regras['consequents'].map(len)) <= parametros['max_len']
+    return regras[filtro].reset_index(drop=True)
+
+
+# tipo -> (o resultado guardado com estes parâmetros responde ao pedido?, como filtrá-lo)
+DERIVACOES = {
+    'itemsets': (
+        lambda g, p: g['min_support'] <= p['min_support'] and _cobre_max_len(g.get('max_len'), p.get('max_len')),
+        _filtrar_itemsets
+    ),
+    'regras': (
+        lambda g, p: (g['min_support'] <= p['min_support'] and g['min_confidence'] <= p['min_confidence']
+                      and _cobre_max_len(g.get('max_len'), p.get('max_len'))),
+        _filtrar_regras
+    ),
+    'top_pares': (
+        lambda g, p: g['k'] >= p['k'],
+        lambda pares, p: pares[:p['k']]
+    ),
+}
+
+
+class CacheResultados:
+    def __init__(self, pasta=PASTA_RESULTADOS, limite_mb=LIMITE_MB):
+        self.pasta = pasta
+        self.limite = int(limite_mb * 2**20)
+        os.makedirs(self.pasta, exist_ok=True)
+        self._arquivo_indice = os.path.join(self.pasta, 'indice.json')
+        self._arquivo_trava = os.path.join(self.pasta, 'indice.lock')
+        self.acertos = 0
+        self.faltas = 0
+
+    def _ler_indice(self):
+        if not os.path.exists(self._arquivo_indice):
+            return {}
+        with open(self._arquivo_indice) as f:
+            indice = json.load(f)
+        # entradas cujo arquivo sumiu são descartadas
+        return {chave: e for chave, e in indice.items() if os.path.exists(os.path.join(self.pasta, e['arquivo']))}
+
+    @contextmanager
+    def _travado(self):
+        with open(self._arquivo_trava, 'a') as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def _ultimo_acesso(self, entrada):
+        try:
+            return os.path.getmtime(os.path.join(self.pasta, entrada['arquivo']))
+        except OSError:
+            return 0.0
+
+    def _varrer_orfaos(self, indice):
+        # .pkl sem entrada no índice (execução interrompida entre gravar o .pkl e o índice)
+        conhecidos = {e['arquivo'] for e in indice.values()}
+        for caminho in glob.glob(os.path.join(self.pasta, '*.pkl')):
+            if os.path.basename(caminho) not in conhecidos:
+                os.remove(caminho)
+
+    def _gravar_indice(self, indice):
+        temporario = self._arquivo_indice + '.tmp'
+        with open(temporario, 'w') as f:
+            json.dump(indice, f)
+        os.replace(temporario, self._arquivo_indice)
+
+    def _chave(self, tipo, digital, parametros):
+        texto = json.dumps([tipo, digital, parametros], sort_keys=True)
+        return hashlib.sha256(texto.encode()).hexdigest()[:32]
+
+    def obter(self, tipo, digital, parametros):
+        cobre, filtrar = DERIVACOES[tipo]
+        indice = self._ler_indice()
+        chave = self._chave(tipo, digital, parametros)
+        if chave in indice:
+            escolhida = chave
+        else:
+            # entre as entradas que cobrem o pedido, a de menor tamanho (a mais próxima dele)
+            candidatas = [
+                c for c, e in indice.items()
+                if e['tipo'] == tipo and e['digital'] == digital and cobre(e['parametros'], parametros)
+            ]
+            escolhida = min(candidatas, key=lambda c: indice[c]['tamanho'], default=None)
+        if escolhida is None:
+            self.faltas += 1
+            return None
+
+        caminho = os.path.join(self.pasta, indice[escolhida]['arquivo'])
+        try:
+            with open(caminho, 'rb') as f:
+                resultado = pickle.load(f)
+            os.utime(caminho)
+        except FileNotFoundError:
+            # removida por outro processo (LRU) entre a leitura do índice e a do arquivo
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return resultado if escolhida == chave else filtrar(resultado, parametros)
+
+    def guardar(self, tipo, digital, parametros, resultado):
+        chave = self._chave(tipo, digital, parametros)
+        arquivo = f'{tipo}-{chave}.pkl'
+        caminho = os.path.join(self.pasta, arquivo)
+        with self._travado():
+            indice = self._ler_indice()
+            self._varrer_orfaos(indice)
+            with open(caminho + '.tmp', 'wb') as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(caminho + '.tmp', caminho)
+            indice[chave] = {
+                'arquivo': arquivo,
+                'tipo': tipo,
+                'digital': digital,
+                'parametros': parametros,
+                'tamanho': os.path.getsize(caminho)
+            }
+
+            # LRU: remove as entradas menos usadas até caber no limite
+            total = sum(e['tamanho'] for e in indice.values())
+            for antiga in sorted(indice, key=lambda c: self._ultimo_acesso(indice[c])):
+                if total <= self.limite or antiga == chave:
+                    break
+                total -= indice[antiga]['tamanho']
+                antigo = os.path.join(self.pasta, indice.pop(antiga)['arquivo'])
+                if os.path.exists(antigo):
+                    os.remove(antigo)
+            self._gravar_indice(indice)
+        return resultado
+
+    def obter_ou_calcular(self, tipo, digital, parametros, calcular):
+        resultado = self.obter(tipo, digital, parametros)
+        if resultado is None:
+            resultado = self.guardar(tipo, digital, parametros, calcular())
+        return resultado
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Cestas de clientes como bitsets: cada produto recebe um id inteiro e cada cliente vira
+# uma linha de palavras uint64 (bit j ligado = comprou o produto j). Um cliente ocupa
+# ceil(produtos/64) * 8 bytes, contra centenas de bytes por item num set de strings.
+# É a forma em memória das compras por cliente usada pela similaridade, pelas
+# recomendações e pelo servidor. Jaccard = popcount(a & b) / popcount(a | b);
+# similaridades() compara um cliente com todos os outros numa única operação vetorizada.
+
+BLOCO_CLIENTES = 4096
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    # numpy < 2.0: conta os bits pelos bytes
+    def _popcount(palavras):
+        palavras = np.ascontiguousarray(palavras)
+        return np.unpackbits(palavras.view(np.uint8), axis=-1).reshape(*palavras.shape, 64).sum(axis=-1)
+
+
+def _desempacotar(palavras):
+    # bits de uma ou mais linhas de palavras como 0/1: a coluna j é o produto j
+    return np.unpackbits(palavras.astype('<u8').view(np.uint8), axis=-1, bitorder='little')
+
+
+class CestasBitset:
+    def __init__(self, clientes, produtos, linhas, colunas):
+        # linhas/colunas: pares (posição do cliente, id do produto) de cada compra
+        self.clientes = list(clientes)
+        self.produtos = list(produtos)
+        self.posicoes = {cliente: i for i, cliente in enumerate(self.clientes)}
+
+        linhas = np.asarray(linhas, dtype=np.int64)
+        colunas = np.asarray(colunas, dtype=np.int64)
+        self.bits = np.zeros((len(self.clientes), max(1, -(-len(self.produtos) // 64))), dtype=np.uint64)
+        np.bitwise_or.at(self.bits, (linhas, colunas >> 6), np.left_shift(np.uint64(1), (colunas & 63).astype(np.uint64)))
+        self.tamanhos = _popcount(self.bits).sum(axis=1).astype(np.int64)
+        # quantos clientes compraram cada produto
+        self.frequencias = np.zeros(len(self.produtos), dtype=np.int64)
+        for inicio in range(0, len(self.clientes), BLOCO_CLIENTES):
+            bloco = _desempacotar(self.bits[inicio:inicio + BLOCO_CLIENTES])
+            self.frequencias += bloco[:, :len(self.produtos)].sum(axis=0, dtype=np.int64)
+
+    @classmethod
+    def de_csr(cls, indptr, indices, clientes, produtos):
+        linhas = np.repeat(np.arange(len(clientes)), np.diff(np.asarray(indptr)))
+        return cls(clientes, produtos, linhas, indices)
+
+    def __len__(self):
+        return len(self.clientes)
+
+    def __contains__(self, cliente):
+        return cliente in self.posicoes
+
+    def __iter__(self):
+        return iter(self.clientes)
+
+    def ids_de(self, cliente):
+        return np.flatnonzero(_desempacotar(self.bits[self.posicoes[cliente]]))
+
+    def produtos_de(self, cliente):
+        return [self.produtos[j] for j in self.ids_de(cliente).tolist()]
+
+    def produtos_em_comum(self, cliente1, cliente2):
+        comum = self.bits[self.posicoes[cliente1]] & self.bits[self.posicoes[cliente2]]
+        return [self.produtos[j] for j in np.flatnonzero(_desempacotar(comum)).tolist()]
+
+    def bitset(self, cliente):
+        return int.from_bytes(self.bits[self.posicoes[cliente]].astype('<u8').tobytes(), 'little')
+
+    def compras(self):
+        # todas as compras como (posição do cliente, id do produto), ordenadas por cliente
+        linhas, colunas = [], []
+        for inicio in range(0, len(self.clientes), BLOCO_CLIENTES):
+            bloco_linhas, bloco_colunas = np.nonzero(_desempacotar(self.bits[inicio:inicio + BLOCO_CLIENTES]))
+            linhas.append(bloco_linhas + inicio)
+            colunas.append(bloco_colunas)
+        return np.concatenate(linhas or [[]]).astype(np.int64), np.concatenate(colunas or [[]]).astype(np.int64)
+
+    def somar_por_produto(self, posicoes, pesos):
+        # soma, para cada produto, os pesos dos clientes (em posicoes) que o compraram
+        total = np.zeros(len(self.produtos))
+        for inicio in range(0, len(posicoes), BLOCO_CLIENTES):
+            bloco = _desempacotar(self.bits[posicoes[inicio:inicio + BLOCO_CLIENTES]])[:, :len(self.produtos)]
+            total += np.asarray(pesos[inicio:inicio + BLOCO_CLIENTES], dtype=np.float64) @ bloco
+        return total
+
+    def similaridades(self, cliente):
+        # Jaccard do cliente contra todos (inclusive ele mesmo), na ordem de self.clientes
+        i = self.posicoes[cliente]
+        intersecoes = _popcount(self.bits & self.bits[i]).sum(axis=1)
+        unioes = self.tamanhos + self.tamanhos[i] - intersecoes
+        return np.divide(intersecoes, unioes, out=np.zeros(len(self.clientes)), where=unioes > 0)
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from agregacoes import VisoesAgregadas
+
+# ETL em blocos de comportamento_de_compra.csv: cada bloco é lido com tipos declarados,
+# tratado (renomeação, data, valor_total) e anexado ao CSV de saída; só as visões
+# agregadas (por produto, cliente e dia) ficam em memória, então o pico de memória
+# depende do tamanho do bloco.
+
+COLUNAS = {
+    'IDCliente': 'cliente',
+    'NomeProduto': 'produto',
+    'Quantidade': 'quantidade',
+    'Preco': 'preco',
+    'Data': 'data'
+}
+
+TIPOS = {
+    'IDCliente': 'category',
+    'NomeProduto': 'category',
+    'Quantidade': 'int16',
+    'Preco': 'float32',
+    'Data': 'string'
+}
+
+FORMATO_DATA = '%Y-%m-%d'
+
+
+def valor_total(preco, quantidade):
+    # preços têm centavos: o produto em float64 arredondado evita o erro do float32;
+    # usado pelos dois modos do exerc4 para que os totais sejam os mesmos
+    return (preco.astype('float64') * quantidade).round(2)
+
+
+def tratar_bloco(bloco):
+    bloco = bloco.rename(columns=COLUNAS)
+    bloco['data'] = pd.to_datetime(bloco['data'], format=FORMATO_DATA)
+    bloco['valor_total'] = valor_total(bloco['preco'], bloco['quantidade'])
+    return bloco
+
+
+def processar_em_blocos(caminho, saida=None, tamanho_bloco=100_000):
+    visoes = VisoesAgregadas(
+        dimensoes={'produto': 'produto', 'cliente': 'cliente', 'dia': 'data'},
+        medidas=['quantidade', 'valor_total']
+    )
+    colunas = None
+
+    leitor = pd.read_csv(caminho, usecols=list(COLUNAS), dtype=TIPOS, chunksize=tamanho_bloco)
+    for i, bloco in enumerate(leitor):
+        bloco = tratar_bloco(bloco)
+        colunas = list(bloco.columns)
+        visoes.atualizar(bloco)
+
+        if saida is not None:
+            bloco.to_csv(saida, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+    dias = visoes.serie('dia', 'quantidade', 'contagem').index
+    return {
+        'linhas': visoes.linhas,
+        'colunas': colunas or list(COLUNAS.values()) + ['valor_total'],
+        'visoes': visoes,
+        'total_vendas': visoes.serie('dia', 'valor_total').sum(),
+        'quantidade_por_produto': visoes.serie('produto', 'quantidade'),
+        'gasto_por_cliente': visoes.serie('cliente', 'valor_total'),
+        'data_min': dias.min() if len(dias) else None,
+        'data_max': dias.max() if len(dias) else None
+    }
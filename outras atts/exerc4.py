@@ -1,52 +1,75 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 
-df = pd.read_csv('comportamento_de_compra.csv')
-print("Primeiras 10 linhas do dataset:")
-print(df.head(10))
-print("\n" + "="*50 + "\n")
+from etl_vendas import processar_em_blocos, valor_total
+from agregacoes import VisoesAgregadas
+from cache_colunar import ler_csv
+from graficos import RenderizadorGraficos, barras, figura
 
-df_clean = df.drop('IDTransacao', axis=1)
+parser = argparse.ArgumentParser(description='ETL de comportamento_de_compra.csv')
+parser.add_argument('--streaming', action='store_true', help='Processar o CSV em blocos com memória limitada')
+parser.add_argument('--tamanho-bloco', type=int, default=100_000, help='Linhas por bloco no modo --streaming')
+parser.add_argument('--headless', action='store_true', help='Grava os gráficos em PNG em vez de abrir janelas')
+parser.add_argument('--pasta-graficos', default='graficos', help='Pasta dos PNGs no modo --headless')
+args = parser.parse_args()
 
-df_clean = df_clean.rename(columns={
-    'IDCliente': 'cliente',
-    'NomeProduto': 'produto',
-    'Quantidade': 'quantidade',
-    'Preco': 'preco',
-    'Data': 'data'
-})
+graficos = RenderizadorGraficos(headless=args.headless, pasta=args.pasta_graficos)
 
-print("DataFrame após limpeza e renomeação:")
-print(df_clean.head())
-print("\n" + "="*50 + "\n")
+if args.streaming:
+    # leitura em blocos com tipos declarados; só os agregados ficam em memória
+    resumo = processar_em_blocos('comportamento_de_compra.csv', 'vendas_tratadas.csv', args.tamanho_bloco)
+    visoes = resumo['visoes']
+    print(f"Processadas {resumo['linhas']} linhas em blocos de {args.tamanho_bloco}")
+    print("\n" + "="*50 + "\n")
+else:
+    df = ler_csv('comportamento_de_compra.csv', categorias=['IDCliente', 'NomeProduto'])
+    print("Primeiras 10 linhas do dataset:")
+    print(df.head(10))
+    print("\n" + "="*50 + "\n")
 
-df_clean['data'] = pd.to_datetime(df_clean['data'])
-print("Info após conversão de data:")
-print(df_clean.info())
-print("\n" + "="*50 + "\n")
+    df_clean = df.drop('IDTransacao', axis=1)
+
+    df_clean = df_clean.rename(columns={
+        'IDCliente': 'cliente',
+        'NomeProduto': 'produto',
+        'Quantidade': 'quantidade',
+        'Preco': 'preco',
+        'Data': 'data'
+    })
 
-df_clean['valor_total'] = df_clean['preco'] * df_clean['quantidade']
-total_vendas = df_clean['valor_total'].sum()
+    print("DataFrame após limpeza e renomeação:")
+    print(df_clean.head())
+    print("\n" + "="*50 + "\n")
+
+    df_clean['data'] = pd.to_datetime(df_clean['data'], format='%Y-%m-%d')
+    print("Info após conversão de data:")
+    print(df_clean.info())
+    print("\n" + "="*50 + "\n")
+
+    df_clean['valor_total'] = valor_total(df_clean['preco'], df_clean['quantidade'])
+    # visões por produto e cliente calculadas numa única passada; o relatório só lê delas
+    visoes = VisoesAgregadas({'produto': 'produto', 'cliente': 'cliente'}, ['quantidade', 'valor_total'])
+    visoes.atualizar(df_clean)
+
+quantidade_por_produto = visoes.serie('produto', 'quantidade')
+gasto_por_cliente = visoes.serie('cliente', 'valor_total')
+total_vendas = gasto_por_cliente.sum()
 print(f"Total de vendas: R$ {total_vendas:,.2f}")
 
-produto_mais_vendido = df_clean.groupby('produto')['quantidade'].sum().idxmax()
-quantidade_mais_vendido = df_clean.groupby('produto')['quantidade'].sum().max()
+produto_mais_vendido = quantidade_por_produto.idxmax()
+quantidade_mais_vendido = quantidade_por_produto.max()
 print(f"Produto mais vendido: {produto_mais_vendido} ({quantidade_mais_vendido} unidades)")
 
-media_compras_cliente = df_clean.groupby('cliente')['valor_total'].sum().mean()
+media_compras_cliente = gasto_por_cliente.mean()
 print(f"Média de compras por cliente: R$ {media_compras_cliente:,.2f}")
 print("\n" + "="*50 + "\n")
 
-top_5_produtos = df_clean.groupby('produto')['quantidade'].sum().sort_values(ascending=False).head(5)
+top_5_produtos = quantidade_por_produto.sort_values(ascending=False).head(5)
 
-plt.figure(figsize=(10, 6))
-top_5_produtos.plot(kind='bar', color='skyblue')
-plt.title('Top 5 Produtos Mais Vendidos (por quantidade)')
-plt.xlabel('Produto')
-plt.ylabel('Quantidade Vendida')
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
+graficos.enviar(figura('top_5_produtos.png', [
+    barras(top_5_produtos, cor='skyblue', titulo='Top 5 Produtos Mais Vendidos (por quantidade)',
+           xlabel='Produto', ylabel='Quantidade Vendida')
+]))
 
 print("Top 5 produtos mais vendidos:")
 for i, (produto, quantidade) in enumerate(top_5_produtos.items(), 1):
@@ -54,12 +77,20 @@ for i, (produto, quantidade) in enumerate(top_5_produtos.items(), 1):
 
 print("\n" + "="*50 + "\n")
 
-df_final = df_clean.copy()
-df_final.to_csv('vendas_tratadas.csv', index=False)
+if args.streaming:
+    n_linhas, colunas = resumo['linhas'], resumo['colunas']
+    data_min, data_max = resumo['data_min'], resumo['data_max']
+else:
+    df_clean.to_csv('vendas_tratadas.csv', index=False)
+    n_linhas, colunas = len(df_clean), list(df_clean.columns)
+    data_min, data_max = df_clean['data'].min(), df_clean['data'].max()
 print("DataFrame salvo como 'vendas_tratadas.csv'")
 
 print("\nInformações do DataFrame final:")
-print(f"Número de linhas: {len(df_final)}")
-print(f"Número de colunas: {len(df_final.columns)}")
-print(f"Colunas: {list(df_final.columns)}")
-print(f"Período das vendas: {df_final['data'].min().strftime('%d/%m/%Y')} a {df_final['data'].max().strftime('%d/%m/%Y')}")
\ No newline at end of file
+print(f"Número de linhas: {n_linhas}")
+print(f"Número de colunas: {len(colunas)}")
+print(f"Colunas: {colunas}")
+print(f"Período das vendas: {data_min.strftime('%d/%m/%Y')} a {data_max.strftime('%d/%m/%Y')}")
+
+for caminho in graficos.concluir():
+    print(f"Gráfico salvo em {caminho}")
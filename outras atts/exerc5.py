@@ -1,8 +1,21 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-df = pd.read_csv('vendas_tratadas.csv')
+from cache_colunar import ler_csv
+from agregacoes import VisoesAgregadas
+from graficos import RenderizadorGraficos, barras, boxplot, figura, histograma
+
+parser = argparse.ArgumentParser(description='Análise descritiva de vendas_tratadas.csv')
+parser.add_argument('--headless', action='store_true', help='Grava os gráficos em PNG em vez de abrir janelas')
+parser.add_argument('--pasta-graficos', default='graficos', help='Pasta dos PNGs no modo --headless')
+args = parser.parse_args()
+
+graficos = RenderizadorGraficos(headless=args.headless, pasta=args.pasta_graficos)
+
+df = ler_csv('vendas_tratadas.csv', categorias=['cliente', 'produto'])
+visoes = VisoesAgregadas({'produto': 'produto'}, ['quantidade'])
+visoes.atualizar(df)
 
 print("Colunas disponíveis no arquivo:")
 print(df.columns.tolist())
@@ -22,33 +35,20 @@ print("\n" + "="*60)
 
 print("\n2. GRÁFICOS:")
 
-plt.figure(figsize=(15, 10))
-
-plt.subplot(2, 2, 1)
-plt.hist(df['preco'], bins=15, color='lightblue', edgecolor='black')
-plt.title('Histograma do Preço dos Produtos')
-plt.xlabel('Preço (R$)')
-plt.ylabel('Frequência')
+# histograma e boxplot vão resumidos (contagens por faixa e quartis), não a coluna inteira
+graficos.enviar(figura('distribuicoes.png', [
+    histograma(df['preco'], bins=15, cor='lightblue', borda='black',
+               titulo='Histograma do Preço dos Produtos', xlabel='Preço (R$)', ylabel='Frequência'),
+    boxplot(df['quantidade'], titulo='Boxplot das Quantidades', ylabel='Quantidade')
+], grade=(1, 2), tamanho=(15, 5)))
 
-plt.subplot(2, 2, 2)
-plt.boxplot(df['quantidade'])
-plt.title('Boxplot das Quantidades')
-plt.ylabel('Quantidade')
-
-plt.subplot(2, 2, 3)
-produtos_vendidos = df.groupby('produto')['quantidade'].sum().sort_values(ascending=False)
+produtos_vendidos = visoes.serie('produto', 'quantidade').sort_values(ascending=False)
 top_produtos = produtos_vendidos.head(10)
 
-fig, ax1 = plt.subplots(figsize=(12, 6))
-ax1.bar(range(len(top_produtos)), top_produtos.values, color='lightblue')
-ax1.set_xlabel('Produtos')
-ax1.set_ylabel('Quantidade Vendida', color='blue')
-ax1.tick_params(axis='y', labelcolor='blue')
-plt.xticks(range(len(top_produtos)), top_produtos.index, rotation=45)
-
-plt.title('Top 10 Produtos Mais Vendidos')
-plt.tight_layout()
-plt.show()
+graficos.enviar(figura('top_10_produtos.png', [
+    barras(top_produtos, cor='lightblue', titulo='Top 10 Produtos Mais Vendidos',
+           xlabel='Produtos', ylabel='Quantidade Vendida')
+], tamanho=(12, 6)))
 
 print("\n3. MEDIDAS ESTATÍSTICAS DO PREÇO:")
 media = df['preco'].mean()
@@ -83,4 +83,7 @@ else:
 print("\nTOP 5 PRODUTOS MAIS VENDIDOS:")
 top_5 = produtos_vendidos.head()
 for i, (produto, quantidade) in enumerate(top_5.items(), 1):
-    print(f"{i}. {produto}: {quantidade} unidades")
\ No newline at end of file
+    print(f"{i}. {produto}: {quantidade} unidades")
+
+for caminho in graficos.concluir():
+    print(f"Gráfico salvo em {caminho}")
@@ -1,8 +1,17 @@
 import pandas as pd
 import numpy as np
-from mlxtend.frequent_patterns import apriori, association_rules
+from varredura_suporte import varrer_limiares
+from cache_resultados import CacheResultados
+from matriz_cesta import montar_cesta, frequencia_produtos
+from cache_colunar import ler_csv
 
-df = pd.read_csv('comportamento_de_compra.csv')
+ALGORITMO = 'apriori'  # ou 'fpgrowth': mesmos itemsets, menos memória em suportes baixos, outra ordem de linhas
+PROCESSOS = None  # > 1 divide a mineração entre processos (SON)
+USAR_CACHE = True  # reaproveita itemsets/regras de execuções anteriores (.cache/resultados)
+SUPORTES = [0.02, 0.01]
+CONFIANCAS = [0.5, 0.3]
+
+df = ler_csv('comportamento_de_compra.csv', categorias=['IDCliente', 'NomeProduto'])
 
 print("Primeiras linhas do dataset:")
 print(df.head())
@@ -10,26 +19,28 @@ print("\n" + "="*60)
 
 print("1. CRIANDO MATRIZ BINÁRIA DE TRANSAÇÕES")
 
-transacoes = df.groupby(['IDTransacao', 'NomeProduto'])['Quantidade'].sum().unstack(fill_value=0)
-transacoes_binarias = (transacoes > 0).astype(int)
+transacoes_binarias = montar_cesta(df, 'IDTransacao', 'NomeProduto', 'Quantidade')
 
 print(f"Dimensões da matriz: {transacoes_binarias.shape}")
 print(f"Número de transações: {len(transacoes_binarias)}")
 print(f"Número de produtos: {len(transacoes_binarias.columns)}")
 
 print("\nFrequência dos produtos mais comuns:")
-freq_produtos = transacoes_binarias.sum().sort_values(ascending=False)
+freq_produtos = frequencia_produtos(transacoes_binarias).sort_values(ascending=False)
 print(freq_produtos.head(10))
 print("\n" + "="*60)
 
-print("2. APLICANDO ALGORITMO APRIORI")
+print(f"2. APLICANDO ALGORITMO {ALGORITMO.upper()}")
 print("Parâmetros: min_support=0.02, metric='confidence', min_threshold=0.5")
 
-frequent_itemsets = apriori(transacoes_binarias, min_support=0.02, use_colnames=True)
+# minera uma única vez no menor suporte; os demais limiares são filtros sobre esse resultado
+varredura = varrer_limiares(transacoes_binarias, SUPORTES, CONFIANCAS, algorithm=ALGORITMO, processos=PROCESSOS,
+                            cache=CacheResultados() if USAR_CACHE else None)
+frequent_itemsets = varredura.itemsets(0.02)
 print(f"\nNúmero de itemsets frequentes encontrados: {len(frequent_itemsets)}")
 
 if len(frequent_itemsets) > 0:
-    regras = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.5)
+    regras = varredura.regras(0.02, 0.5)
     print(f"Número de regras encontradas: {len(regras)}")
     
     if len(regras) > 0:
@@ -76,10 +87,10 @@ if len(frequent_itemsets) > 0:
         print("\n" + "="*60)
         print("5. TESTANDO COM SUPORTE = 0.01")
 
-        frequent_itemsets_001 = apriori(transacoes_binarias, min_support=0.01, use_colnames=True)
+        frequent_itemsets_001 = varredura.itemsets(0.01)
         print(f"\nNúmero de itemsets frequentes com suporte 0.01: {len(frequent_itemsets_001)}")
 
-        regras_001 = association_rules(frequent_itemsets_001, metric="confidence", min_threshold=0.5)
+        regras_001 = varredura.regras(0.01, 0.5)
         print(f"Número de regras com suporte 0.01: {len(regras_001)}")
 
         print(f"\nCOMPARAÇÃO:")
@@ -96,15 +107,19 @@ if len(frequent_itemsets) > 0:
     else:
         print("Nenhuma regra encontrada com os parâmetros atuais.")
         print("Tentando com confiança mínima mais baixa...")
-        regras = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.3)
+        regras = varredura.regras(0.02, 0.3)
         print(f"Regras encontradas com confiança 0.3: {len(regras)}")
         
 else:
     print("Nenhum itemset frequente encontrado com suporte 0.02.")
     print("Tentando com suporte mais baixo...")
-    frequent_itemsets = apriori(transacoes_binarias, min_support=0.01, use_colnames=True)
+    frequent_itemsets = varredura.itemsets(0.01)
     print(f"Itemsets encontrados com suporte 0.01: {len(frequent_itemsets)}")
 
+print("\n" + "="*60)
+print("VARREDURA DE LIMIARES (uma única mineração):")
+print(varredura.relatorio(SUPORTES, CONFIANCAS).to_string(index=False))
+
 print("\n" + "="*60)
 print("RESUMO DAS MÉTRICAS:")
 print("Suporte: Frequência de ocorrência do itemset no dataset")
@@ -0,0 +1,175 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Gerador sintético de transações para testes de carga, no formato de
+# comportamento_de_compra.csv. Tudo é vetorizado com numpy por bloco de transações
+# (tamanho da cesta, produtos, clientes, quantidades, preços e datas), e cada bloco é
+# gravado assim que fica pronto, então a memória depende só do tamanho do bloco.
+# Os produtos de uma cesta são sorteados sem repetição (as repetições são sorteadas de
+# novo), então cada cesta sai com o tamanho pedido em tamanhos_cesta.
+
+PRODUTOS_VALE = {
+    'Hortifruti': ['Banana', 'Laranja', 'Mandioca', 'Tomate', 'Alface'],
+    'Laticínios': ['Queijo', 'Leite', 'Manteiga', 'Iogurte', 'Requeijão'],
+    'Padaria': ['Pão', 'Biscoito', 'Bolacha', 'Rosca', 'Bolo'],
+    'Bebidas': ['Café', 'Refrigerante', 'Suco', 'Cerveja', 'Vinho'],
+    'Açougue': ['Carne', 'Frango', 'Linguiça', 'Peixe', 'Ovos']
+}
+# cestas típicas do Vale do Ribeira (como em projeto.py): até 3 destes produtos juntos
+PRODUTOS_TIPICOS = ['Banana', 'Mandioca', 'Laranja', 'Peixe']
+
+# probabilidade de cestas com 1 a 6 produtos (mais prob. compras pequenas)
+TAMANHOS_CESTA = [0.25, 0.25, 0.2, 0.15, 0.1, 0.05]
+
+
+def catalogo(n_produtos=None, seed=42):
+    # sem n_produtos usa os 25 produtos do Vale; senão gera Produto_00001, Produto_00002, ...
+    if n_produtos is None:
+        produtos = [p for prods in PRODUTOS_VALE.values() for p in prods]
+    else:
+        produtos = [f"Produto_{i:05d}" for i in range(1, n_produtos + 1)]
+    rng = np.random.default_rng(seed)
+    precos = np.round(rng.uniform(1.5, 120.0, size=len(produtos)), 2)
+    return np.array(produtos), precos
+
+
+def gerar_bloco(rng, primeira_transacao, n_transacoes, produtos, precos, n_clientes,
+                zipf=1.0, prob_tipica=0.3, tipicos=None, tamanhos_cesta=TAMANHOS_CESTA,
+                data_inicio='2025-01-01', dias=365):
+    # popularidade tipo Zipf: o produto de posição r tem peso 1 / r^zipf
+    pesos = 1.0 / np.arange(1, len(produtos) + 1) ** zipf
+    pesos /= pesos.sum()
+
+    tamanhos = np.minimum(rng.choice(len(tamanhos_cesta), size=n_transacoes, p=tamanhos_cesta) + 1, len(produtos))
+    tipica = np.zeros(n_transacoes, dtype=bool)
+    if tipicos is not None and len(tipicos) > 0 and prob_tipica > 0:
+        tipica = rng.random(n_transacoes) < prob_tipica
+        tamanhos[tipica] = np.minimum(tamanhos[tipica], min(3, len(tipicos)))
+
+    transacao = np.repeat(np.arange(n_transacoes), tamanhos)
+    linha_tipica = np.repeat(tipica, tamanhos)
+    produto = rng.choice(len(produtos), size=len(transacao), p=pesos)
+    if linha_tipica.any():
+        produto[linha_tipica] = rng.choice(tipicos, size=int(linha_tipica.sum()))
+
+    # sem repetição de produto dentro da mesma transação: mantém a primeira ocorrência e
+    # sorteia de novo as demais (da mesma distribuição) até não sobrar repetição
+    while True:
+        chave = transacao.astype(np.int64) * len(produtos) + produto
+        ordem = np.argsort(chave, kind='stable')
+        repetidas = ordem[1:][chave[ordem[1:]] == chave[ordem[:-1]]]
+        if len(repetidas) == 0:
+            break
+        novos = rng.choice(len(produtos), size=len(repetidas), p=pesos)
+        tipicas = linha_tipica[repetidas]
+        if tipicas.any():
+            novos[tipicas] = rng.choice(tipicos, size=int(tipicas.sum()))
+        produto[repetidas] = novos
+    ordem = np.argsort(chave, kind='stable')
+    transacao, produto = transacao[ordem], produto[ordem]
+
+    clientes = rng.integers(1, n_clientes + 1, size=n_transacoes)
+    datas = np.datetime64(data_inicio, 'D') + rng.integers(0, dias, size=n_transacoes)
+
+    return pd.DataFrame({
+        'IDTransacao': primeira_transacao + transacao,
+        'IDCliente': pd.Categorical.from_codes(clientes[transacao] - 1, [f"C{i:06d}" for i in range(1, n_clientes + 1)]),
+        'NomeProduto': pd.Categorical.from_codes(produto, produtos),
+        'Quantidade': rng.integers(1, 4, size=len(produto)).astype(np.int16),
+        'Preco': precos[produto],
+        'Data': datas[transacao]
+    })
+
+
+def distribuicao_tamanhos(tamanhos_cesta=TAMANHOS_CESTA, prob_tipica=0.3, n_tipicos=0, n_produtos=None):
+    # proporção esperada de cestas com 1, 2, ... produtos, já com o corte das cestas típicas
+    esperada = np.zeros(len(tamanhos_cesta))
+    tamanhos = np.arange(1, len(tamanhos_cesta) + 1)
+    if n_produtos is not None:
+        tamanhos = np.minimum(tamanhos, n_produtos)
+    fracao_tipica = prob_tipica if n_tipicos > 0 else 0.0
+    np.add.at(esperada, tamanhos - 1, (1 - fracao_tipica) * np.asarray(tamanhos_cesta))
+    np.add.at(esperada, np.minimum(tamanhos, min(3, max(n_tipicos, 1))) - 1, fracao_tipica * np.asarray(tamanhos_cesta))
+    return esperada
+
+
+def conferir_tamanhos(contagens, esperada):
+    # compara a proporção obtida de cada tamanho de cesta com a esperada; a tolerância é
+    # de 5 desvios-padrão de uma proporção com n transações (0.5 / sqrt(n) no pior caso)
+    contagens = np.pad(contagens, (0, max(0, len(esperada) - len(contagens))))
+    obtida = contagens / contagens.sum()
+    desvio = float(np.abs(obtida[:len(esperada)] - esperada).max())
+    if len(obtida) > len(esperada):
+        desvio = max(desvio, float(obtida[len(esperada):].sum()))
+    return obtida, desvio, desvio <= 2.5 / np.sqrt(contagens.sum())
+
+
+def escrever_transacoes(caminho, n_transacoes, n_clientes=1000, n_produtos=None, seed=42,
+                        tamanho_bloco=1_000_000, vale=True, **opcoes):
+    produtos, precos = catalogo(n_produtos, seed)
+    tipicos = np.flatnonzero(np.isin(produtos, PRODUTOS_TIPICOS)) if vale else None
+    parquet = os.path.splitext(caminho)[1] == '.parquet'
+
+    escritor = None
+    linhas = 0
+    contagens = np.zeros(0, dtype=np.int64)
+    for i, inicio in enumerate(range(0, n_transacoes, tamanho_bloco)):
+        # uma semente por bloco: o resultado não depende da ordem de execução dos blocos
+        rng = np.random.default_rng([seed, i])
+        bloco = gerar_bloco(rng, inicio + 1, min(tamanho_bloco, n_transacoes - inicio),
+                            produtos, precos, n_clientes, tipicos=tipicos, **opcoes)
+        linhas += len(bloco)
+        # contagem de cestas por tamanho (índice 0 = 1 produto)
+        por_tamanho = np.bincount(np.bincount(bloco['IDTransacao'] - inicio - 1))[1:]
+        contagens = np.pad(contagens, (0, max(0, len(por_tamanho) - len(contagens))))
+        contagens[:len(por_tamanho)] += por_tamanho
+        if parquet:
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela)
+        else:
+            bloco.to_csv(caminho, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                         date_format='%Y-%m-%d')
+    if escritor is not None:
+        escritor.close()
+    return linhas, contagens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de transações sintéticas para testes de carga')
+    parser.add_argument('saida', help='Arquivo de saída (.csv ou .parquet)')
+    parser.add_argument('--transacoes', type=int, default=100_000, help='Número de transações')
+    parser.add_argument('--clientes', type=int, default=1000, help='Número de clientes')
+    parser.add_argument('--produtos', type=int, default=None, help='Número de produtos (padrão: catálogo do Vale)')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Expoente da popularidade dos produtos')
+    parser.add_argument('--prob-tipica', type=float, default=0.3, help='Fração de cestas típicas do Vale do Ribeira')
+    parser.add_argument('--tamanho-bloco', type=int, default=1_000_000, help='Transações por bloco gravado')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--conferir', action='store_true', help='Falha se os tamanhos de cesta fugirem da distribuição pedida')
+
+    args = parser.parse_args()
+
+    linhas, contagens = escrever_transacoes(
+        args.saida, args.transacoes, n_clientes=args.clientes, n_produtos=args.produtos,
+        seed=args.seed, tamanho_bloco=args.tamanho_bloco, zipf=args.zipf, prob_tipica=args.prob_tipica
+    )
+    print(f"Arquivo {args.saida} gerado: {args.transacoes} transações, {linhas} linhas")
+
+    produtos, _ = catalogo(args.produtos, args.seed)
+    esperada = distribuicao_tamanhos(TAMANHOS_CESTA, args.prob_tipica,
+                                     int(np.isin(produtos, PRODUTOS_TIPICOS).sum()), len(produtos))
+    obtida, desvio, ok = conferir_tamanhos(contagens, esperada)
+    print("Tamanho das cestas (esperado -> obtido): " +
+          ", ".join(f"{t}: {e:.3f} -> {o:.3f}" for t, (e, o) in enumerate(zip(esperada, obtida), 1)))
+    if args.conferir and not ok:
+        raise SystemExit(f"Distribuição de tamanhos diferente da pedida (desvio máximo {desvio:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Gráficos descritos como dados: cada figura é um dict com arquivo, grade e painéis, e
+# cada painel guarda só o que precisa ser desenhado (barras, contagens de histograma,
+# estatísticas de boxplot, matriz reduzida de heatmap). Séries grandes são resumidas
+# antes de sair do processo principal (np.histogram, quartis, médias por bloco), então
+# o que vai para os workers é pequeno. matplotlib só é importado na hora de desenhar:
+# no modo headless, em processos separados com o backend Agg, gravando arquivos PNG.
+
+MAX_OUTLIERS = 500
+MAX_CELULAS_HEATMAP = 200
+
+
+def figura(arquivo, paineis, grade=(1, 1), tamanho=(10, 6)):
+    return {'arquivo': arquivo, 'paineis': list(paineis), 'grade': grade, 'tamanho': tamanho}
+
+
+def barras(serie, horizontal=False, **opcoes):
+    return {
+        'tipo': 'barras_h' if horizontal else 'barras',
+        'rotulos': [str(r) for r in serie.index],
+        'valores': [float(v) for v in serie.values],
+        **opcoes
+    }
+
+
+def histograma(valores, bins=20, **opcoes):
+    valores = np.asarray(valores, dtype='float64')
+    contagens, bordas = np.histogram(valores[~np.isnan(valores)], bins=bins)
+    return {'tipo': 'histograma', 'contagens': contagens, 'bordas': bordas, **opcoes}
+
+
+def boxplot(valores, max_outliers=MAX_OUTLIERS, **opcoes):
+    # mesmas estatísticas do boxplot do matplotlib (bigodes a 1,5 IQR), com os outliers amostrados
+    valores = np.sort(np.asarray(valores, dtype='float64'))
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    outliers = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+    if len(outliers) > max_outliers:
+        outliers = np.random.default_rng(0).choice(outliers, max_outliers, replace=False)
+    estatisticas = {
+        'med': mediana, 'q1': q1, 'q3': q3,
+        'whislo': dentro.min(), 'whishi': dentro.max(),
+        'fliers': outliers
+    }
+    return {'tipo': 'boxplot', 'estatisticas': estatisticas, **opcoes}
+
+
+def heatmap(matriz, rotulos=None, max_celulas=MAX_CELULAS_HEATMAP, **opcoes):
+    # matrizes maiores que max_celulas x max_celulas viram médias por bloco
+    matriz = np.asarray(matriz, dtype='float64')
+    passo = max(1, int(np.ceil(max(matriz.shape) / max_celulas)))
+    if passo > 1:
+        linhas = -(-matriz.shape[0] // passo) * passo
+        colunas = -(-matriz.shape[1] // passo) * passo
+        preenchida = np.full((linhas, colunas), np.nan)
+        preenchida[:matriz.shape[0], :matriz.shape[1]] = matriz
+        matriz = np.nanmean(preenchida.reshape(linhas // passo, passo, colunas // passo, passo), axis=(1, 3))
+        rotulos = None
+    return {'tipo': 'heatmap', 'matriz': matriz, 'rotulos': rotulos, **opcoes}
+
+
+def pizza(rotulos, valores, **opcoes):
+    return {'tipo': 'pizza', 'rotulos': list(rotulos), 'valores': list(valores), **opcoes}
+
+
+def texto(mensagem, **opcoes):
+    return {'tipo': 'texto', 'texto': mensagem, **opcoes}
+
+
+def _desenhar_painel(ax, painel):
+    tipo = painel['tipo']
+    if tipo == 'barras':
+        posicoes = range(len(painel['valores']))
+        ax.bar(posicoes, painel['valores'], color=painel.get('cor'), alpha=painel.get('alpha'))
+        ax.set_xticks(posicoes, painel['rotulos'], rotation=painel.get('rotacao', 45),
+                      ha=painel.get('ha', 'center'), fontsize=painel.get('fonte'))
+    elif tipo == 'barras_h':
+        ax.barh(painel['rotulos'], painel['valores'], color=painel.get('cor'))
+    elif tipo == 'histograma':
+        bordas = painel['bordas']
+        ax.bar(bordas[:-1], painel['contagens'], width=np.diff(bordas), align='edge', color=painel.get('cor'),
+               alpha=painel.get('alpha'), edgecolor=painel.get('borda'))
+    elif tipo == 'boxplot':
+        ax.bxp([painel['estatisticas']])
+    elif tipo == 'heatmap':
+        imagem = ax.imshow(painel['matriz'], cmap=painel.get('cmap', 'YlGnBu'), aspect='auto')
+        ax.figure.colorbar(imagem, ax=ax)
+        if painel['rotulos'] is not None:
+            ax.set_xticks(range(len(painel['rotulos'])), painel['rotulos'], rotation=90)
+            ax.set_yticks(range(len(painel['rotulos'])), painel['rotulos'])
+    elif tipo == 'pizza':
+        ax.pie(painel['valores'], labels=painel['rotulos'], autopct='%1.1f%%', colors=painel.get('cores'))
+    elif tipo == 'texto':
+        ax.text(0.5, 0.5, painel['texto'], ha='center', va='center', transform=ax.transAxes)
+    else:
+        raise ValueError(f"Tipo de painel não suportado: {tipo}")
+
+    ax.set_title(painel.get('titulo', ''), **({'fontweight': 'bold'} if painel.get('negrito') else {}))
+    ax.set_xlabel(painel.get('xlabel', ''))
+    ax.set_ylabel(painel.get('ylabel', ''))
+
+
+def _desenhar(plt, especificacao):
+    fig = plt.figure(figsize=especificacao['tamanho'])
+    linhas, colunas = especificacao['grade']
+    for i, painel in enumerate(especificacao['paineis'], 1):
+        _desenhar_painel(fig.add_subplot(linhas, colunas, i), painel)
+    fig.tight_layout()
+    return fig
+
+
+def _salvar_figura(especificacao, pasta):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    caminho = os.path.join(pasta, especificacao['arquivo'])
+    fig = _desenhar(plt, especificacao)
+    fig.savefig(caminho, dpi=100)
+    plt.close(fig)
+    return caminho
+
+
+class RenderizadorGraficos:
+    def __init__(self, headless=False, pasta='graficos', processos=None):
+        # headless: grava PNGs em paralelo; caso contrário abre as janelas com plt.show()
+        self.headless = headless
+        self.pasta = pasta
+        self.processos = processos
+        self._executor = None
+        self._pendentes = []
+
+    def enviar(self, especificacao):
+        if not self.headless:
+            import matplotlib.pyplot as plt
+            _desenhar(plt, especificacao)
+            plt.show()
+            return
+        if self._executor is None:
+            os.makedirs(self.pasta, exist_ok=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.processos)
+        self._pendentes.append(self._executor.submit(_salvar_figura, especificacao, self.pasta))
+
+    def concluir(self):
+        caminhos = [pendente.result() for pendente in self._pendentes]
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._pendentes = []
+        return caminhos
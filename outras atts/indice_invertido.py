@@ -0,0 +1,45 @@
+import pickle
+
+import numpy as np
+
+# Índice invertido produto -> clientes que o compraram, montado a partir das cestas em
+# bitset (CestasBitset): as listas de clientes ficam num único array ordenado por produto,
+# com um ponteiro de início por produto. Uma consulta só visita clientes que têm ao menos
+# um produto em comum com o alvo; com um limiar t, Jaccard >= t exige
+# t*|A| <= |B| <= |A|/t, e clientes fora dessa faixa de tamanho são descartados antes
+# de contar a interseção.
+
+
+class IndiceInvertido:
+    def __init__(self, cestas):
+        self.cestas = cestas
+        linhas, colunas = cestas.compras()
+        ordem = np.argsort(colunas, kind='stable')
+        self.clientes_por_produto = linhas[ordem]
+        self.inicio_produto = np.concatenate(([0], np.cumsum(np.bincount(colunas, minlength=len(cestas.produtos)))))
+
+    def vizinhos(self, cliente, limiar=0.0):
+        # (posições dos clientes com produto em comum, Jaccard de cada um), em ordem de posição
+        i = self.cestas.posicoes[cliente]
+        ids = self.cestas.ids_de(cliente)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        outros = np.concatenate([
+            self.clientes_por_produto[self.inicio_produto[j]:self.inicio_produto[j + 1]] for j in ids.tolist()
+        ])
+        tamanho = len(ids)
+        tamanhos = self.cestas.tamanhos[outros]
+        manter = outros != i
+        if limiar > 0:
+            manter &= (tamanhos >= limiar * tamanho) & (tamanhos <= tamanho / limiar)
+        posicoes, intersecoes = np.unique(outros[manter], return_counts=True)
+        return posicoes, intersecoes / (tamanho + self.cestas.tamanhos[posicoes] - intersecoes)
+
+    def salvar(self, caminho):
+        with open(caminho, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def carregar(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
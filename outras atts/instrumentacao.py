@@ -0,0 +1,129 @@
+import cProfile
+import json
+import platform
+import pstats
+import resource
+import time
+import tracemalloc
+
+# Instrumentação por etapa para scripts lineares (projeto.py): cada chamada a etapa()
+# encerra a anterior e abre uma nova, registrando tempo de parede, tempo de CPU, pico de
+# memória alocada (tracemalloc), RSS máximo do processo e as contagens informadas com
+# contar(). Com amostrar=True a etapa também roda sob cProfile e guarda as funções mais
+# caras. O resultado é um JSON com chaves em ordem fixa, para comparar execuções com diff.
+# Desativado (ativo=False), todas as chamadas viram no-op.
+
+FUNCOES_POR_ETAPA = 15
+
+
+def _rss_max_kb():
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _funcoes_mais_caras(perfil, limite):
+    estatisticas = pstats.Stats(perfil)
+    linhas = []
+    for (arquivo, linha, nome), (_, chamadas, proprio, acumulado, _) in estatisticas.stats.items():
+        linhas.append({
+            'funcao': f'{arquivo}:{linha}({nome})',
+            'chamadas': chamadas,
+            'tempo_proprio': round(proprio, 6),
+            'tempo_acumulado': round(acumulado, 6)
+        })
+    linhas.sort(key=lambda l: (-l['tempo_acumulado'], l['funcao']))
+    return linhas[:limite]
+
+
+class Perfilador:
+    def __init__(self, ativo=True, amostrar=False):
+        self.ativo = ativo
+        self.amostrar = amostrar
+        self.etapas = []
+        self._atual = None
+        if self.ativo and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._inicio = (time.perf_counter(), time.process_time())
+
+    def etapa(self, nome, amostrar=False):
+        if not self.ativo:
+            return self
+        self.encerrar()
+        tracemalloc.reset_peak()
+        perfil = None
+        if amostrar and self.amostrar:
+            perfil = cProfile.Profile()
+            perfil.enable()
+        self._atual = {
+            'nome': nome,
+            'contagens': {},
+            'perfil': perfil,
+            'memoria_inicial': tracemalloc.get_traced_memory()[0],
+            'parede': time.perf_counter(),
+            'cpu': time.process_time()
+        }
+        return self
+
+    def contar(self, **contagens):
+        if self._atual is not None:
+            self._atual['contagens'].update({k: int(v) for k, v in contagens.items()})
+
+    def encerrar(self):
+        if self._atual is None:
+            return
+        atual, self._atual = self._atual, None
+        parede = time.perf_counter() - atual['parede']
+        cpu = time.process_time() - atual['cpu']
+        if atual['perfil'] is not None:
+            atual['perfil'].disable()
+        memoria_final, pico = tracemalloc.get_traced_memory()
+
+        registro = {
+            'nome': atual['nome'],
+            'segundos': round(parede, 6),
+            'cpu_segundos': round(cpu, 6),
+            'pico_memoria_kb': (pico - atual['memoria_inicial']) // 1024,
+            'memoria_retida_kb': (memoria_final - atual['memoria_inicial']) // 1024,
+            'rss_max_kb': _rss_max_kb(),
+            'contagens': dict(sorted(atual['contagens'].items()))
+        }
+        if atual['perfil'] is not None:
+            registro['funcoes'] = _funcoes_mais_caras(atual['perfil'], FUNCOES_POR_ETAPA)
+        self.etapas.append(registro)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.encerrar()
+        return False
+
+    def resumo(self):
+        self.encerrar()
+        parede, cpu = self._inicio
+        return {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'total': {
+                'segundos': round(time.perf_counter() - parede, 6),
+                'cpu_segundos': round(time.process_time() - cpu, 6),
+                'rss_max_kb': _rss_max_kb()
+            },
+            'etapas': self.etapas
+        }
+
+    def salvar(self, caminho):
+        if not self.ativo:
+            return
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.resumo(), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+    def imprimir(self):
+        if not self.ativo:
+            return
+        print(f"\n{'Etapa':<22}{'Parede (s)':>12}{'CPU (s)':>10}{'Pico (KB)':>12}  Contagens")
+        for etapa in self.resumo()['etapas']:
+            contagens = ', '.join(f'{k}={v}' for k, v in etapa['contagens'].items())
+            print(f"{etapa['nome']:<22}{etapa['segundos']:>12.3f}{etapa['cpu_segundos']:>10.3f}"
+                  f"{etapa['pico_memoria_kb']:>12}  {contagens}")
@@ -1,98 +1,184 @@
 import pandas as pd
 import argparse
-from itertools import combinations
+import heapq
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+
+from indice_invertido import IndiceInvertido
+from cache_colunar import carregar_cestas_bitset
+from cache_resultados import CacheResultados
 
 def carregar_dados():
-    df = pd.read_csv('compras.csv')
-    compras_por_cliente = df.groupby('cliente')['produto'].apply(set).to_dict()
-    return compras_por_cliente
-
-def indice_jaccard(set1, set2):
-    if not set1 or not set2:
-        return 0
-    intersecao = len(set1.intersection(set2))
-    uniao = len(set1.union(set2))
-    return intersecao / uniao if uniao > 0 else 0
-
-def calcular_similaridades(compras_por_cliente):
-    clientes = list(compras_por_cliente.keys())
-    similaridades = []
-    
-    for cliente1, cliente2 in combinations(clientes, 2):
-        similaridade = indice_jaccard(
-            compras_por_cliente[cliente1], 
-            compras_por_cliente[cliente2]
+    # cache colunar: o CSV só é lido de novo quando muda; as cestas ficam em bitsets (CestasBitset)
+    return carregar_cestas_bitset('compras.csv', 'cliente', 'produto')
+
+def indice_jaccard(bits1, bits2):
+    # cestas como int do Python (CestasBitset.bitset): |A ∩ B| e |A ∪ B| por popcount
+    uniao = (bits1 | bits2).bit_count()
+    return (bits1 & bits2).bit_count() / uniao if uniao else 0
+
+def calcular_similaridades(cestas):
+    # todos os pares em colunas: cada cliente é comparado com todos os seguintes de uma vez
+    n = len(cestas)
+    linhas = [cestas.similaridades(cliente)[i + 1:] for i, cliente in enumerate(cestas.clientes)]
+    primeiro = np.repeat(np.arange(n), np.arange(n - 1, -1, -1))
+    segundo = np.concatenate([np.arange(i + 1, n) for i in range(n)] or [[]]).astype(np.int64)
+    similaridades = np.concatenate(linhas or [[]])
+    ordem = np.argsort(-similaridades, kind='stable')
+    clientes = np.asarray(cestas.clientes, dtype=object)
+    return pd.DataFrame({
+        'cliente1': clientes[primeiro[ordem]],
+        'cliente2': clientes[segundo[ordem]],
+        'similaridade': similaridades[ordem]
+    })
+
+# top-k de pares sem materializar todos: cada cliente i consulta o índice invertido só
+# pelos pares (i, j > i) com produto em comum, e os escores passam por um heap de
+# tamanho k que guarda apenas (similaridade, -i, -j). Com o heap cheio, o menor escore
+# vira limiar e o filtro de tamanho do índice descarta clientes que não podem superá-lo.
+# Em paralelo, cada processo cobre os clientes i ≡ r (mod processos) e devolve seu heap.
+_indice_pares = None
+
+def _iniciar_processo_pares(indice):
+    global _indice_pares
+    _indice_pares = indice
+
+def _top_pares_particao(particao):
+    k, resto, processos = particao
+    clientes = _indice_pares.cestas.clientes
+    heap = []
+    for i in range(resto, len(clientes), processos):
+        limiar = heap[0][0] if len(heap) == k else 0.0
+        posicoes, similaridades = _indice_pares.vizinhos(clientes[i], limiar=limiar)
+        for j, similaridade in zip(posicoes.tolist(), similaridades.tolist()):
+            if j > i:
+                item = (similaridade, -i, -j)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+    return heap
+
+def _pares_sem_produto_comum(n, positivos):
+    # pares (i, j) com i < j em ordem lexicográfica, pulando os de `positivos` (ordenados) por merge:
+    # gerado sob demanda, custa O(pares consumidos + len(positivos)) em vez de O(n²)
+    positivos = iter(positivos)
+    proximo = next(positivos, None)
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            if (i, j) == proximo:
+                proximo = next(positivos, None)
+            else:
+                yield i, j
+
+
+def top_pares_similares(cestas, k=3, processos=1, indice=None, cache=None):
+    if cache is not None:
+        # o top-k de um k maior já guardado responde pelos seus k primeiros pares
+        from cache_resultados import digital_cestas
+        return cache.obter_ou_calcular(
+            'top_pares', digital_cestas(cestas), {'k': k},
+            lambda: top_pares_similares(cestas, k, processos=processos, indice=indice)
         )
-        similaridades.append({
-            'cliente1': cliente1,
-            'cliente2': cliente2,
-            'similaridade': similaridade,
-            'produtos_cliente1': compras_por_cliente[cliente1],
-            'produtos_cliente2': compras_por_cliente[cliente2]
-        })
-    
-    return sorted(similaridades, key=lambda x: x['similaridade'], reverse=True)
+    if indice is None:
+        indice = IndiceInvertido(cestas)
+    clientes = cestas.clientes
+    k = min(k, len(clientes) * (len(clientes) - 1) // 2)
+    if k <= 0:
+        return []
 
-def recomendar_produtos(cliente_alvo, compras_por_cliente, top_n=3):
-    recomendacoes = {}
-    
-    for outro_cliente, produtos in compras_por_cliente.items():
-        if outro_cliente != cliente_alvo:
-            similaridade = indice_jaccard(
-                compras_por_cliente[cliente_alvo],
-                produtos
-            )
-            
-            produtos_novos = produtos - compras_por_cliente[cliente_alvo]
-            for produto in produtos_novos:
-                if produto not in recomendacoes:
-                    recomendacoes[produto] = {'frequencia': 0, 'similaridade_total': 0}
-                recomendacoes[produto]['frequencia'] += 1
-                recomendacoes[produto]['similaridade_total'] += similaridade
+    particoes = [(k, resto, processos) for resto in range(processos)]
+    if processos == 1:
+        _iniciar_processo_pares(indice)
+        heaps = [_top_pares_particao(particoes[0])]
+    else:
+        with Pool(processos, initializer=_iniciar_processo_pares, initargs=(indice,)) as pool:
+            heaps = pool.map(_top_pares_particao, particoes)
+    melhores = heapq.nlargest(k, (item for heap in heaps for item in heap))
+
+    # mesma ordem de calcular_similaridades: similaridade decrescente e, no empate, ordem dos pares
+    pares = [(clientes[-i], clientes[-j], similaridade) for similaridade, i, j in melhores]
+    if len(pares) < k:
+        # menos de k pares com produto em comum: completa com pares de similaridade 0
+        positivos = sorted((-i, -j) for _, i, j in melhores)
+        zerados = islice(_pares_sem_produto_comum(len(clientes), positivos), k - len(pares))
+        pares.extend((clientes[i], clientes[j], 0) for i, j in zerados)
+    return [{'cliente1': c1, 'cliente2': c2, 'similaridade': s} for c1, c2, s in pares]
+
+def recomendar_produtos(cliente_alvo, cestas, top_n=3, indice=None):
+    if indice is None:
+        indice = IndiceInvertido(cestas)
     
-    for produto, dados in recomendacoes.items():
-        dados['score'] = dados['frequencia'] * dados['similaridade_total']
+    # só clientes com algum produto em comum contribuem para a similaridade
+    posicoes, similaridades = indice.vizinhos(cliente_alvo)
+    similaridade_total = cestas.somar_por_produto(posicoes, similaridades)
+    similaridade_total[cestas.ids_de(cliente_alvo)] = 0
+    candidatos = np.flatnonzero(similaridade_total > 0)
     
-    return sorted(recomendacoes.items(), key=lambda x: x[1]['score'], reverse=True)[:top_n]
+    # frequência = todos os clientes que compraram o produto
+    scores = cestas.frequencias[candidatos] * similaridade_total[candidatos]
+    melhores = candidatos[np.lexsort((candidatos, -scores))[:top_n]]
+    return [
+        (cestas.produtos[j], {
+            'frequencia': int(cestas.frequencias[j]),
+            'similaridade_total': float(similaridade_total[j]),
+            'score': float(cestas.frequencias[j] * similaridade_total[j])
+        })
+        for j in melhores.tolist()
+    ]
 
 def main():
     parser = argparse.ArgumentParser(description='Sistema de Recomendação por Similaridade de Jaccard')
     parser.add_argument('--detalhe', nargs=2, help='Calcular similaridade entre dois clientes específicos')
+    parser.add_argument('--lote', metavar='SAIDA', help='Gerar recomendações para todos os clientes em um arquivo Parquet')
+    parser.add_argument('--top-n', type=int, default=3, help='Número de recomendações por cliente no modo --lote')
+    parser.add_argument('--processos', type=int, default=None, help='Processos do pool no modo --lote e na busca dos pares (padrão: núcleos da máquina)')
+    parser.add_argument('--sem-cache', action='store_true', help='Recalcula os pares mais similares mesmo que estejam no cache')
     
     args = parser.parse_args()
     
-    compras_por_cliente = carregar_dados()
+    cestas = carregar_dados()
+    indice = IndiceInvertido(cestas)
+    
+    if args.lote:
+        from recomendacao_lote import recomendar_todos
+        resumo = recomendar_todos(cestas, args.lote, top_n=args.top_n,
+                                  processos=args.processos, indice=indice)
+        print(f"Recomendações gravadas em {args.lote}: {resumo['recomendacoes']} linhas para {resumo['clientes']} clientes")
+        print(f"Tempo: {resumo['segundos']:.2f}s ({resumo['clientes_por_segundo']:,.0f} clientes/s)")
+        return
     
     print("PRODUTOS POR CLIENTE:")
-    for cliente, produtos in compras_por_cliente.items():
-        print(f"Cliente {cliente}: {', '.join(produtos)}")
+    for cliente in cestas:
+        print(f"Cliente {cliente}: {', '.join(cestas.produtos_de(cliente))}")
     
     print("\n" + "="*50)
     print("3 PARES DE CLIENTES MAIS SIMILARES:")
     
-    similaridades = calcular_similaridades(compras_por_cliente)
+    cache = None if args.sem_cache else CacheResultados()
+    similaridades = top_pares_similares(cestas, k=3, processos=args.processos or 1,
+                                        indice=indice, cache=cache)
     
-    for i, sim in enumerate(similaridades[:3], 1):
+    for i, sim in enumerate(similaridades, 1):
         print(f"\n{i}. {sim['cliente1']} e {sim['cliente2']}")
         print(f"   Similaridade Jaccard: {sim['similaridade']:.3f}")
-        print(f"   Produtos em comum: {', '.join(sim['produtos_cliente1'].intersection(sim['produtos_cliente2']))}")
+        print(f"   Produtos em comum: {', '.join(cestas.produtos_em_comum(sim['cliente1'], sim['cliente2']))}")
     
     if args.detalhe:
         cliente1, cliente2 = args.detalhe
-        if cliente1 in compras_por_cliente and cliente2 in compras_por_cliente:
+        if cliente1 in cestas and cliente2 in cestas:
             print(f"\n" + "="*50)
             print(f"DETALHE: {cliente1} vs {cliente2}")
-            similaridade = indice_jaccard(
-                compras_por_cliente[cliente1],
-                compras_por_cliente[cliente2]
-            )
+            similaridade = indice_jaccard(cestas.bitset(cliente1), cestas.bitset(cliente2))
             print(f"Similaridade Jaccard: {similaridade:.3f}")
-            print(f"Produtos {cliente1}: {', '.join(compras_por_cliente[cliente1])}")
-            print(f"Produtos {cliente2}: {', '.join(compras_por_cliente[cliente2])}")
-            print(f"Produtos em comum: {', '.join(compras_por_cliente[cliente1].intersection(compras_por_cliente[cliente2]))}")
+            print(f"Produtos {cliente1}: {', '.join(cestas.produtos_de(cliente1))}")
+            print(f"Produtos {cliente2}: {', '.join(cestas.produtos_de(cliente2))}")
+            print(f"Produtos em comum: {', '.join(cestas.produtos_em_comum(cliente1, cliente2))}")
             
             print(f"\nRECOMENDAÇÕES PARA {cliente1}:")
-            recomendacoes = recomendar_produtos(cliente1, compras_por_cliente)
+            recomendacoes = recomendar_produtos(cliente1, cestas, indice=indice)
             for produto, dados in recomendacoes:
                 print(f"- {produto} (score: {dados['score']:.3f})")
         else:
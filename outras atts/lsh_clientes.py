@@ -0,0 +1,219 @@
+import argparse
+import heapq
+import os
+import pickle
+import random
+from collections import defaultdict
+
+import numpy as np
+
+from cache_colunar import _hash_arquivo, _nova_meta
+from jaccard_app import carregar_dados
+
+# Índice MinHash + LSH para busca aproximada de clientes similares (Jaccard).
+# Cada cliente vira uma assinatura de `num_hashes` mínimos; a assinatura é cortada em
+# `bandas` faixas e clientes com alguma faixa idêntica caem no mesmo balde. Mais bandas
+# (com menos linhas cada) aumentam o recall; menos bandas deixam a busca mais rápida.
+# O índice salvo guarda tamanho, mtime e SHA-256 do compras.csv de origem e os parâmetros
+# (num_hashes, bandas, seed, versão do formato), como o cache colunar; carregar_indice()
+# reconstrói quando algum deles difere.
+
+PRIMO = (1 << 31) - 1
+BLOCO_CLIENTES = 4096
+ARQUIVO_COMPRAS = 'compras.csv'
+VERSAO_FORMATO = 1
+
+
+class IndiceMinHash:
+    def __init__(self, cestas, num_hashes=128, bandas=32, seed=42):
+        if num_hashes % bandas != 0:
+            raise ValueError("num_hashes precisa ser múltiplo de bandas")
+        self.num_hashes = num_hashes
+        self.bandas = bandas
+        self.seed = seed
+        # metadados do CSV de origem (preenchido por carregar_indice)
+        self.origem = None
+        self.linhas_por_banda = num_hashes // bandas
+
+        # clientes com cesta vazia não têm assinatura
+        self.clientes = [c for c, tamanho in zip(cestas.clientes, cestas.tamanhos.tolist()) if tamanho > 0]
+        self.posicao = {c: i for i, c in enumerate(self.clientes)}
+
+        # h_i(x) = (a_i * x + b_i) mod p, pré-calculado para todos os ids de produto
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, PRIMO, size=num_hashes, dtype=np.int64)
+        b = rng.integers(0, PRIMO, size=num_hashes, dtype=np.int64)
+        hashes = (a[:, None] * np.arange(len(cestas.produtos), dtype=np.int64)[None, :] + b[:, None]) % PRIMO
+
+        self.assinaturas = np.empty((len(self.clientes), num_hashes), dtype=np.uint32)
+        for inicio in range(0, len(self.clientes), BLOCO_CLIENTES):
+            bloco = [cestas.ids_de(c) for c in self.clientes[inicio:inicio + BLOCO_CLIENTES]]
+            indices = np.concatenate(bloco)
+            tamanhos = [len(ids) for ids in bloco]
+            inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+            minimos = np.minimum.reduceat(hashes[:, indices], inicios, axis=1)
+            self.assinaturas[inicio:inicio + len(bloco)] = minimos.T
+
+        self._montar_baldes()
+
+    def _montar_baldes(self):
+        self.baldes = [defaultdict(list) for _ in range(self.bandas)]
+        for banda in range(self.bandas):
+            faixa = self.assinaturas[:, banda * self.linhas_por_banda:(banda + 1) * self.linhas_por_banda]
+            for i, chave in enumerate(map(bytes, faixa)):
+                self.baldes[banda][chave].append(i)
+
+    def _candidatos(self, i):
+        candidatos = set()
+        for banda in range(self.bandas):
+            faixa = self.assinaturas[i, banda * self.linhas_por_banda:(banda + 1) * self.linhas_por_banda]
+            candidatos.update(self.baldes[banda][bytes(faixa)])
+        candidatos.discard(i)
+        return candidatos
+
+    def similaridade_estimada(self, cliente1, cliente2):
+        i, j = self.posicao[cliente1], self.posicao[cliente2]
+        return float(np.mean(self.assinaturas[i] == self.assinaturas[j]))
+
+    def similar_customers(self, cliente, k=5):
+        if cliente not in self.posicao:
+            return []
+        i = self.posicao[cliente]
+        candidatos = np.fromiter(self._candidatos(i), dtype=np.int64)
+        if len(candidatos) == 0:
+            return []
+        estimativas = (self.assinaturas[candidatos] == self.assinaturas[i]).mean(axis=1)
+        melhores = heapq.nlargest(k, zip(estimativas, candidatos))
+        return [(self.clientes[j], float(sim)) for sim, j in melhores]
+
+    def top_pairs(self, k=10):
+        vistos = set()
+        heap = []
+        for baldes_banda in self.baldes:
+            for membros in baldes_banda.values():
+                for x in range(len(membros)):
+                    for y in range(x + 1, len(membros)):
+                        par = (membros[x], membros[y])
+                        if par in vistos:
+                            continue
+                        vistos.add(par)
+                        sim = float(np.mean(self.assinaturas[par[0]] == self.assinaturas[par[1]]))
+                        if len(heap) < k:
+                            heapq.heappush(heap, (sim, par))
+                        elif sim > heap[0][0]:
+                            heapq.heapreplace(heap, (sim, par))
+        return [(self.clientes[i], self.clientes[j], sim) for sim, (i, j) in sorted(heap, reverse=True)]
+
+    def salvar(self, caminho):
+        with open(caminho, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def carregar(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+
+def _opcoes(num_hashes, bandas, seed):
+    return {'num_hashes': num_hashes, 'bandas': bandas, 'seed': seed, 'formato': VERSAO_FORMATO}
+
+
+def _motivo_reconstruir(indice, caminho_compras, opcoes):
+    # None se o índice salvo ainda corresponde ao CSV e aos parâmetros pedidos
+    origem = getattr(indice, 'origem', None)
+    if not isinstance(origem, dict) or origem.get('opcoes', {}).get('formato') != VERSAO_FORMATO:
+        return "formato do índice desatualizado"
+    if origem['opcoes'] != opcoes:
+        return "parâmetros diferentes dos pedidos"
+    estado = os.stat(caminho_compras)
+    if origem.get('tamanho') != estado.st_size:
+        return f"{caminho_compras} mudou"
+    if origem.get('mtime_ns') != estado.st_mtime_ns and origem.get('sha256') != _hash_arquivo(caminho_compras):
+        return f"{caminho_compras} mudou"
+    return None
+
+
+def carregar_indice(caminho, caminho_compras=ARQUIVO_COMPRAS, num_hashes=128, bandas=32, seed=42, construir=False):
+    opcoes = _opcoes(num_hashes, bandas, seed)
+    if construir:
+        motivo = None
+    elif not os.path.exists(caminho):
+        motivo = "não encontrado"
+    else:
+        try:
+            indice = IndiceMinHash.carregar(caminho)
+        except Exception as erro:
+            motivo = f"ilegível ({type(erro).__name__})"
+        else:
+            motivo = _motivo_reconstruir(indice, caminho_compras, opcoes)
+            if motivo is None:
+                if indice.origem['mtime_ns'] != os.stat(caminho_compras).st_mtime_ns:
+                    # conteúdo igual (arquivo apenas tocado): atualiza o mtime para não refazer o hash
+                    indice.origem['mtime_ns'] = os.stat(caminho_compras).st_mtime_ns
+                    indice.salvar(caminho)
+                return indice
+
+    if motivo:
+        print(f"Índice {caminho} {motivo}; construindo a partir de {caminho_compras}")
+    # metadados lidos antes de construir: se o CSV mudar no meio, o próximo carregamento reconstrói
+    origem = _nova_meta(caminho_compras, opcoes)
+    indice = IndiceMinHash(carregar_dados(), num_hashes=num_hashes, bandas=bandas, seed=seed)
+    indice.origem = origem
+    indice.salvar(caminho)
+    print(f"Índice salvo em {caminho}: {len(indice.clientes)} clientes, {indice.num_hashes} hashes, {indice.bandas} bandas")
+    return indice
+
+
+def avaliar_recall(indice, cestas, amostra=50, k=5, seed=42):
+    # recall@k contra o Jaccard exato (popcount das cestas em bitset): um vizinho devolvido
+    # pelo LSH conta como acerto se sua similaridade exata empata ou supera a do k-ésimo vizinho exato
+    clientes = list(indice.clientes)
+    consultas = random.Random(seed).sample(clientes, min(amostra, len(clientes)))
+    acertos = 0
+    relevantes = 0
+    for cliente in consultas:
+        similaridades = cestas.similaridades(cliente)
+        similaridades[cestas.posicoes[cliente]] = 0
+        exatas = np.sort(similaridades)[::-1][:k]
+        exatas = exatas[exatas > 0]
+        if len(exatas) == 0:
+            continue
+        relevantes += len(exatas)
+        for outro, _ in indice.similar_customers(cliente, len(exatas)):
+            if similaridades[cestas.posicoes[outro]] >= exatas[-1]:
+                acertos += 1
+    return acertos / relevantes if relevantes else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Índice MinHash/LSH de clientes similares')
+    parser.add_argument('--indice', default='indice_lsh.pkl', help='Arquivo do índice persistido')
+    parser.add_argument('--construir', action='store_true', help='Reconstruir o índice mesmo que compras.csv e os parâmetros não tenham mudado')
+    parser.add_argument('--hashes', type=int, default=128, help='Tamanho da assinatura MinHash')
+    parser.add_argument('--bandas', type=int, default=32, help='Número de bandas do LSH')
+    parser.add_argument('--similares', nargs=2, metavar=('CLIENTE', 'K'), help='Clientes mais similares a CLIENTE')
+    parser.add_argument('--top-pares', type=int, metavar='K', help='K pares de clientes mais similares')
+    parser.add_argument('--recall', type=int, metavar='AMOSTRA', help='Medir recall@5 contra o Jaccard exato')
+
+    args = parser.parse_args()
+
+    indice = carregar_indice(args.indice, num_hashes=args.hashes, bandas=args.bandas, construir=args.construir)
+
+    if args.similares:
+        cliente, k = args.similares
+        print(f"\nCLIENTES MAIS SIMILARES A {cliente}:")
+        for outro, sim in indice.similar_customers(cliente, int(k)):
+            print(f"- {outro} (similaridade estimada: {sim:.3f})")
+
+    if args.top_pares:
+        print(f"\n{args.top_pares} PARES MAIS SIMILARES (estimativa MinHash):")
+        for i, (cliente1, cliente2, sim) in enumerate(indice.top_pairs(args.top_pares), 1):
+            print(f"{i}. {cliente1} e {cliente2}: {sim:.3f}")
+
+    if args.recall:
+        recall = avaliar_recall(indice, carregar_dados(), amostra=args.recall)
+        print(f"\nRecall@5 contra o Jaccard exato (amostra de {args.recall}): {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Matriz transações x produtos esparsa: produtos e transações viram códigos inteiros
+# (pd.Categorical) e só as linhas de venda existentes são armazenadas, então a memória
+# cresce com o número de itens vendidos e não com transações x produtos.
+
+
+def codificar_cestas(df, col_transacao, col_produto, col_quantidade=None):
+    transacoes = pd.Categorical(df[col_transacao])
+    produtos = pd.Categorical(df[col_produto])
+    validos = (transacoes.codes >= 0) & (produtos.codes >= 0)
+    linhas = transacoes.codes[validos]
+    colunas = produtos.codes[validos]
+    forma = (len(transacoes.categories), len(produtos.categories))
+
+    if col_quantidade is None:
+        dados = np.ones(len(linhas), dtype=bool)
+        matriz = sparse.csr_matrix((dados, (linhas, colunas)), shape=forma, dtype=bool)
+    else:
+        # soma as quantidades de produto repetido na mesma transação e mantém só total > 0
+        dados = df[col_quantidade].to_numpy()[validos]
+        matriz = sparse.csr_matrix((dados, (linhas, colunas)), shape=forma)
+        matriz.sum_duplicates()
+        matriz = (matriz > 0).astype(bool)
+
+    matriz.eliminate_zeros()
+    matriz.sort_indices()
+    return matriz, transacoes.categories, produtos.categories
+
+
+def montar_cesta(df, col_transacao, col_produto, col_quantidade=None):
+    matriz, transacoes, produtos = codificar_cestas(df, col_transacao, col_produto, col_quantidade)
+    return pd.DataFrame.sparse.from_spmatrix(
+        matriz,
+        index=pd.Index(transacoes, name=col_transacao),
+        columns=pd.Index(produtos, name=col_produto)
+    )
+
+
+def frequencia_produtos(cesta):
+    contagens = np.asarray(cesta.sparse.to_coo().sum(axis=0)).ravel()
+    return pd.Series(contagens, index=cesta.columns)
+
+
+def matriz_csr(cesta):
+    # volta da cesta (DataFrame esparso ou denso) para a matriz CSR booleana
+    if hasattr(cesta, 'sparse'):
+        matriz = cesta.sparse.to_coo().tocsr()
+    else:
+        matriz = sparse.csr_matrix(cesta.to_numpy())
+    matriz = (matriz != 0).astype(bool)
+    matriz.sort_indices()
+    return matriz
@@ -0,0 +1,46 @@
+# Backends de mineração de itemsets frequentes (mesma saída: colunas 'support' e 'itemsets').
+# 'apriori' gera candidatos nível a nível; 'fpgrowth' monta a árvore FP em duas passadas
+# e minera sem gerar candidatos, o que mantém a memória sob controle em suportes baixos.
+# mlxtend só é importado quando a mineração roda, para não pesar no início dos scripts.
+# Com processos > 1 a mineração é dividida entre processos (ver mineracao_paralela.py).
+# Com um CacheResultados, itemsets e regras são lidos do disco quando a mesma cesta já foi
+# minerada com limiares iguais ou mais frouxos (ver cache_resultados.py).
+ALGORITMOS = ('apriori', 'fpgrowth')
+COLUNAS_REGRAS = ['antecedents', 'consequents', 'support', 'confidence', 'lift']
+
+
+def minerar_itemsets(cesta, min_support, algorithm='apriori', max_len=None, processos=None, cache=None):
+    if algorithm not in ALGORITMOS:
+        raise ValueError(f"Algoritmo não suportado: {algorithm}")
+    if cache is not None:
+        from cache_resultados import digital_cesta
+        return cache.obter_ou_calcular(
+            'itemsets', digital_cesta(cesta), {'min_support': min_support, 'max_len': max_len},
+            lambda: minerar_itemsets(cesta, min_support, algorithm=algorithm, max_len=max_len, processos=processos)
+        )
+    if processos is not None and processos > 1:
+        from mineracao_paralela import minerar_paralelo
+        return minerar_paralelo(cesta, min_support, algorithm=algorithm, max_len=max_len, processos=processos)
+    from mlxtend import frequent_patterns
+    return getattr(frequent_patterns, algorithm)(cesta, min_support=min_support, use_colnames=True, max_len=max_len)
+
+
+def gerar_regras(frequentes, min_confidence):
+    if len(frequentes) == 0:
+        import pandas as pd
+        return pd.DataFrame(columns=COLUNAS_REGRAS)
+    from mlxtend.frequent_patterns import association_rules
+    return association_rules(frequentes, metric="confidence", min_threshold=min_confidence)
+
+
+def minerar_regras(cesta, min_support, min_confidence, algorithm='apriori', max_len=None, processos=None, cache=None):
+    def calcular():
+        frequentes = minerar_itemsets(cesta, min_support, algorithm=algorithm, max_len=max_len,
+                                      processos=processos, cache=cache)
+        return gerar_regras(frequentes, min_confidence)
+
+    if cache is None:
+        return calcular()
+    from cache_resultados import digital_cesta
+    parametros = {'min_support': min_support, 'min_confidence': min_confidence, 'max_len': max_len}
+    return cache.obter_ou_calcular('regras', digital_cesta(cesta), parametros, calcular)
@@ -0,0 +1,155 @@
+import argparse
+import os
+import pickle
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import ler_csv
+
+# Manutenção incremental de itemsets frequentes (estilo FUP / borda negativa).
+# O estado guarda a contagem exata de todos os itemsets frequentes e da borda negativa
+# (itemsets não frequentes cujos subconjuntos são todos frequentes). Um lote novo só
+# atualiza essas contagens; o histórico é reconsultado apenas quando algum itemset da
+# borda passa a ser frequente e gera candidatos que ainda não eram acompanhados.
+# O histórico fica como uma lista de índices verticais (item -> bitset) por lote.
+
+
+def _indice_vertical(transacoes):
+    # tids agrupados por item e cada bitset montado de uma vez (packbits), em tempo linear no lote
+    tids = defaultdict(list)
+    for t, itens in enumerate(transacoes):
+        for item in itens:
+            tids[item].append(t)
+    bits = {}
+    for item, ids in tids.items():
+        presenca = np.zeros(len(transacoes), dtype=bool)
+        presenca[ids] = True
+        bits[item] = int.from_bytes(np.packbits(presenca, bitorder='little').tobytes(), 'little')
+    return bits
+
+
+def _contar(itemset, indice):
+    bits = -1
+    for item in itemset:
+        if item not in indice:
+            return 0
+        bits &= indice[item]
+    return bits.bit_count() if bits != -1 else 0
+
+
+def _borda_negativa(frequentes, itens):
+    # candidatos k+1 pela junção de itemsets k com o mesmo prefixo, podados pelo Apriori
+    borda = {frozenset([item]) for item in itens if frozenset([item]) not in frequentes}
+    por_tamanho = defaultdict(list)
+    for itemset in frequentes:
+        por_tamanho[len(itemset)].append(tuple(sorted(itemset)))
+    for nivel in por_tamanho.values():
+        prefixos = defaultdict(list)
+        for itemset in sorted(nivel):
+            prefixos[itemset[:-1]].append(itemset)
+        for grupo in prefixos.values():
+            for a, b in combinations(grupo, 2):
+                candidato = a + (b[-1],)
+                if all(frozenset(candidato[:i] + candidato[i + 1:]) in frequentes for i in range(len(candidato) - 2)):
+                    borda.add(frozenset(candidato))
+    return borda
+
+
+class MineradorIncremental:
+    def __init__(self, min_support, max_len=None):
+        self.min_support = min_support
+        self.max_len = max_len
+        self.n_transacoes = 0
+        self.contagens = {}
+        self.historico = []
+        self.reconsultas = 0
+
+    def _frequente(self, contagem):
+        return contagem / self.n_transacoes >= self.min_support
+
+    def adicionar(self, transacoes):
+        transacoes = [set(t) for t in transacoes]
+        if not transacoes:
+            return self
+        lote = _indice_vertical(transacoes)
+
+        # 1) atualiza só os itemsets acompanhados, contando apenas no lote novo
+        for itemset in self.contagens:
+            self.contagens[itemset] += _contar(itemset, lote)
+        for item in lote:
+            self.contagens.setdefault(frozenset([item]), lote[item].bit_count())
+        self.historico.append(lote)
+        self.n_transacoes += len(transacoes)
+
+        # 2) enquanto a borda negativa tiver itemsets não acompanhados, conta-os no histórico
+        itens = {next(iter(i)) for i in self.contagens if len(i) == 1}
+        while True:
+            frequentes = {i for i, c in self.contagens.items() if self._frequente(c)}
+            borda = _borda_negativa(frequentes, itens)
+            if self.max_len is not None:
+                borda = {i for i in borda if len(i) <= self.max_len}
+            novos = borda - self.contagens.keys()
+            if not novos:
+                break
+            self.reconsultas += 1
+            for itemset in novos:
+                self.contagens[itemset] = sum(_contar(itemset, indice) for indice in self.historico)
+
+        # 3) descarta o que não é frequente nem borda
+        self.contagens = {i: c for i, c in self.contagens.items() if i in frequentes or i in borda}
+        return self
+
+    def borda_negativa(self):
+        return {i for i, c in self.contagens.items() if not self._frequente(c)}
+
+    def frequentes(self):
+        linhas = [
+            (contagem / self.n_transacoes, itemset)
+            for itemset, contagem in self.contagens.items() if self._frequente(contagem)
+        ]
+        linhas.sort(key=lambda l: (len(l[1]), sorted(l[1])))
+        return pd.DataFrame(linhas, columns=['support', 'itemsets'])
+
+    def salvar(self, caminho):
+        with open(caminho, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def carregar(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+
+def transacoes_do_dataframe(df, col_transacao, col_produto):
+    return df.groupby(col_transacao, observed=True)[col_produto].apply(set).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mineração incremental de itemsets frequentes')
+    parser.add_argument('arquivo', help='CSV com as transações novas (IDTransacao, NomeProduto)')
+    parser.add_argument('--estado', default='estado_incremental.pkl', help='Arquivo com o estado da mineração')
+    parser.add_argument('--suporte', type=float, default=0.02, help='Suporte mínimo (usado ao criar o estado)')
+
+    args = parser.parse_args()
+
+    if os.path.exists(args.estado):
+        minerador = MineradorIncremental.carregar(args.estado)
+    else:
+        minerador = MineradorIncremental(args.suporte)
+
+    reconsultas = minerador.reconsultas
+    df = ler_csv(args.arquivo, categorias=['NomeProduto'])
+    minerador.adicionar(transacoes_do_dataframe(df, 'IDTransacao', 'NomeProduto'))
+    minerador.salvar(args.estado)
+
+    print(f"Transações acumuladas: {minerador.n_transacoes}")
+    print(f"Itemsets frequentes (suporte >= {minerador.min_support}): {len(minerador.frequentes())}")
+    print(f"Itemsets na borda negativa: {len(minerador.borda_negativa())}")
+    print(f"Reconsultas ao histórico neste lote: {minerador.reconsultas - reconsultas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import math
+from collections import Counter, deque
+from itertools import combinations
+
+import pandas as pd
+
+from cache_colunar import ler_csv
+
+# Mineração de regras em janelas deslizantes de tempo (semanas ou meses). Cada período é
+# contado uma única vez (todos os itemsets até max_len de cada transação); a janela
+# desliza somando as contagens do período que entra e subtraindo as do que sai, então
+# uma varredura de 52 semanas custa cerca de uma passada pelos dados. As regras de cada
+# janela são derivadas dessas contagens, com as mesmas colunas de association_rules.
+# Custo: a contagem não poda por suporte (um itemset infrequente numa janela pode ser
+# frequente na seguinte), então a memória cresce com o número de combinações distintas
+# de até max_len produtos que aparecem nos dados, e não só com as frequentes; uma
+# transação com t produtos gera sum(C(t, k), k <= max_len) itemsets. max_len também
+# limita as regras: com max_len=3 nenhuma regra tem mais de 3 produtos. Com
+# max_len=None não há corte e as regras de cada janela são as mesmas de
+# minerar_itemsets + association_rules sobre as transações da janela (ver conferir_janela).
+
+COLUNAS_REGRAS = ['antecedents', 'consequents', 'support', 'confidence', 'lift']
+
+
+def contar_periodo(transacoes, max_len):
+    contagens = Counter()
+    for itens in transacoes:
+        itens = sorted(itens)
+        limite = len(itens) if max_len is None else min(len(itens), max_len)
+        for k in range(1, limite + 1):
+            contagens.update(combinations(itens, k))
+    return contagens
+
+
+def regras_da_janela(contagens, n_transacoes, min_support, min_confidence):
+    if n_transacoes == 0:
+        return pd.DataFrame(columns=COLUNAS_REGRAS)
+    # métricas calculadas sobre os suportes (frações), como em apriori/association_rules,
+    # para que os casos no limite (confiança == min_confidence) sejam decididos igual
+    linhas = []
+    for itemset, contagem in contagens.items():
+        suporte = contagem / n_transacoes
+        if len(itemset) < 2 or suporte < min_support:
+            continue
+        for k in range(1, len(itemset)):
+            for antecedente in combinations(itemset, k):
+                confianca = suporte / (contagens[antecedente] / n_transacoes)
+                if confianca < min_confidence:
+                    continue
+                consequente = tuple(i for i in itemset if i not in antecedente)
+                linhas.append((
+                    frozenset(antecedente),
+                    frozenset(consequente),
+                    suporte,
+                    confianca,
+                    confianca / (contagens[consequente] / n_transacoes)
+                ))
+    return pd.DataFrame(linhas, columns=COLUNAS_REGRAS)
+
+
+def regras_por_janela(df, col_transacao, col_produto, col_data, max_len, frequencia='W', tamanho=4,
+                      min_support=0.02, min_confidence=0.3):
+    # frequencia: 'W' (semanas) ou 'M' (meses); tamanho: quantos períodos formam a janela;
+    # max_len: maior itemset contado (None = sem limite); sem valor padrão, pois define o custo
+    # da contagem e o tamanho máximo das regras
+    datas = pd.to_datetime(df[col_data])
+    periodos = datas.dt.to_period(frequencia).rename('periodo')
+    transacoes = (
+        df.groupby([periodos, df[col_transacao]], observed=True)[col_produto]
+        .apply(set)
+    )
+
+    por_periodo = {}
+    for periodo, cestas in transacoes.groupby(level='periodo'):
+        por_periodo[periodo] = (contar_periodo(cestas, max_len), len(cestas))
+
+    janela = Counter()
+    n_janela = 0
+    fila = deque()
+    for periodo in pd.period_range(periodos.min(), periodos.max(), freq=frequencia):
+        contagens, n = por_periodo.get(periodo, (Counter(), 0))
+        janela.update(contagens)
+        n_janela += n
+        fila.append((periodo, contagens, n))
+
+        if len(fila) > tamanho:
+            _, saindo, n_saindo = fila.popleft()
+            janela.subtract(saindo)
+            n_janela -= n_saindo
+            for itemset in [i for i in saindo if janela[i] == 0]:
+                del janela[itemset]
+
+        if len(fila) == tamanho:
+            yield fila[0][0], periodo, n_janela, regras_da_janela(janela, n_janela, min_support, min_confidence)
+
+
+def _regras_por_chave(regras):
+    return {
+        (frozenset(a), frozenset(c)): (s, conf, l)
+        for a, c, s, conf, l in zip(regras['antecedents'], regras['consequents'], regras['support'],
+                                    regras['confidence'], regras['lift'])
+    }
+
+
+def conferir_janela(df_janela, col_transacao, col_produto, regras, min_support, min_confidence, max_len):
+    # minera as transações da janela do zero (mineracao.minerar_regras) e compara com as regras
+    # derivadas das contagens; devolve as diferenças (vazio = iguais)
+    from matriz_cesta import montar_cesta
+    from mineracao import minerar_regras
+    cesta = montar_cesta(df_janela, col_transacao, col_produto)
+    referencia = _regras_por_chave(minerar_regras(cesta, min_support, min_confidence, max_len=max_len))
+    obtidas = _regras_por_chave(regras)
+    diferencas = [f"faltando: {set(a)} -> {set(c)}" for a, c in referencia.keys() - obtidas.keys()]
+    diferencas += [f"sobrando: {set(a)} -> {set(c)}" for a, c in obtidas.keys() - referencia.keys()]
+    diferencas += [
+        f"métricas diferentes: {set(a)} -> {set(c)}"
+        for (a, c) in referencia.keys() & obtidas.keys()
+        if not all(math.isclose(x, y, rel_tol=1e-9) for x, y in zip(referencia[a, c], obtidas[a, c]))
+    ]
+    return diferencas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Regras de associação por janela deslizante de tempo')
+    parser.add_argument('--arquivo', default='comportamento_de_compra.csv')
+    parser.add_argument('--frequencia', choices=['W', 'M'], default='M', help='Semanas (W) ou meses (M)')
+    parser.add_argument('--tamanho', type=int, default=3, help='Períodos por janela')
+    parser.add_argument('--suporte', type=float, default=0.02)
+    parser.add_argument('--confianca', type=float, default=0.3)
+    parser.add_argument('--max-len', type=int, default=3,
+                        help='Maior itemset contado e maior regra gerada (0 = sem limite; custo cresce com as combinações)')
+    parser.add_argument('--conferir', action='store_true', help='Compara cada janela com minerar_itemsets + association_rules')
+
+    args = parser.parse_args()
+    max_len = args.max_len or None
+
+    df = ler_csv(args.arquivo, categorias=['NomeProduto'])
+    janelas = regras_por_janela(
+        df, 'IDTransacao', 'NomeProduto', 'Data', max_len,
+        frequencia=args.frequencia, tamanho=args.tamanho,
+        min_support=args.suporte, min_confidence=args.confianca
+    )
+    periodos = pd.to_datetime(df['Data']).dt.to_period(args.frequencia)
+    for inicio, fim, n_transacoes, regras in janelas:
+        print(f"\n{inicio} a {fim}: {n_transacoes} transações, {len(regras)} regras" +
+              (f" (até {max_len} produtos)" if max_len else ""))
+        if args.conferir:
+            diferencas = conferir_janela(df[(periodos >= inicio) & (periodos <= fim)], 'IDTransacao', 'NomeProduto',
+                                         regras, args.suporte, args.confianca, max_len)
+            print("Conferência com minerar_itemsets + association_rules: " +
+                  ("iguais" if not diferencas else f"{len(diferencas)} diferenças, ex.: {diferencas[0]}"))
+            if diferencas:
+                raise SystemExit(1)
+        if len(regras) > 0:
+            print(regras.sort_values('lift', ascending=False).head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
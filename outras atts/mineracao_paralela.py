@@ -0,0 +1,136 @@
+import argparse
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from matriz_cesta import matriz_csr
+
+# Mineração paralela em duas passadas (SON). A matriz transações x produtos (CSR) é
+# copiada uma vez para memória compartilhada e os processos a acessam sem cópia.
+# 1ª passada: cada partição de linhas é minerada localmente com o mesmo suporte
+# relativo; todo itemset globalmente frequente é frequente em ao menos uma partição,
+# então a união dos resultados locais contém a resposta.
+# 2ª passada: cada processo conta todos os candidatos na sua partição (bitsets por
+# produto) e a soma das contagens dá o suporte global exato.
+
+_POPCOUNT_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+_matriz = None
+_memorias = None
+
+
+def _compartilhar(array):
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memoria.buf)[:] = array
+    return memoria, (memoria.name, array.shape, array.dtype.str)
+
+
+def _iniciar_processo(descritores, forma):
+    global _matriz, _memorias
+    _memorias, arrays = [], []
+    for nome, shape, dtype in descritores:
+        memoria = shared_memory.SharedMemory(name=nome)
+        _memorias.append(memoria)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=memoria.buf))
+    dados, indices, indptr = arrays
+    _matriz = sparse.csr_matrix((dados, indices, indptr), shape=forma, copy=False)
+
+
+def _minerar_particao(tarefa):
+    from mineracao import minerar_itemsets
+    inicio, fim, min_support, algorithm, max_len = tarefa
+    particao = pd.DataFrame.sparse.from_spmatrix(_matriz[inicio:fim], columns=range(_matriz.shape[1]))
+    locais = minerar_itemsets(particao, min_support, algorithm=algorithm, max_len=max_len)
+    return [tuple(sorted(itemset)) for itemset in locais['itemsets']]
+
+
+def _contar_particao(tarefa):
+    inicio, fim, candidatos = tarefa
+    coluna = _matriz[inicio:fim].tocsc()
+    n_linhas = fim - inicio
+    produtos = sorted({item for candidato in candidatos for item in candidato})
+    bits = {}
+    for j in produtos:
+        presenca = np.zeros(n_linhas, dtype=bool)
+        presenca[coluna.indices[coluna.indptr[j]:coluna.indptr[j + 1]]] = True
+        bits[j] = np.packbits(presenca)
+    contagens = np.empty(len(candidatos), dtype=np.int64)
+    for i, candidato in enumerate(candidatos):
+        juntos = bits[candidato[0]]
+        for item in candidato[1:]:
+            juntos = juntos & bits[item]
+        contagens[i] = _POPCOUNT_BYTE[juntos].sum()
+    return contagens
+
+
+def minerar_paralelo(cesta, min_support, algorithm='apriori', max_len=None, processos=2):
+    matriz = matriz_csr(cesta)
+    n_transacoes = matriz.shape[0]
+    limites = np.linspace(0, n_transacoes, processos + 1).astype(int)
+    particoes = [(inicio, fim) for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+
+    # índices e ponteiros com o mesmo dtype, para o scipy não convertê-los (copiando) nos processos
+    tipo_indice = np.int32 if matriz.nnz < np.iinfo(np.int32).max else np.int64
+    memorias, descritores = [], []
+    for array in (matriz.data, matriz.indices.astype(tipo_indice), matriz.indptr.astype(tipo_indice)):
+        memoria, descritor = _compartilhar(array)
+        memorias.append(memoria)
+        descritores.append(descritor)
+    try:
+        with Pool(processos, initializer=_iniciar_processo, initargs=(descritores, matriz.shape)) as pool:
+            locais = pool.map(_minerar_particao, [(i, f, min_support, algorithm, max_len) for i, f in particoes])
+            candidatos = sorted({itemset for itemsets in locais for itemset in itemsets}, key=lambda c: (len(c), c))
+            contagens = sum(pool.map(_contar_particao, [(i, f, candidatos) for i, f in particoes]))
+    finally:
+        for memoria in memorias:
+            memoria.close()
+            memoria.unlink()
+
+    colunas = cesta.columns
+    suportes = np.asarray(contagens, dtype=np.float64) / n_transacoes if candidatos else np.array([])
+    frequentes = [
+        (suporte, frozenset(colunas[j] for j in candidato))
+        for candidato, suporte in zip(candidatos, suportes) if suporte >= min_support
+    ]
+    return pd.DataFrame(frequentes, columns=['support', 'itemsets'])
+
+
+def main():
+    from gerador_transacoes import catalogo, gerar_bloco
+    from matriz_cesta import montar_cesta
+    from mineracao import minerar_itemsets
+
+    parser = argparse.ArgumentParser(description='Demonstração da mineração paralela (SON)')
+    parser.add_argument('--transacoes', type=int, default=200_000)
+    parser.add_argument('--produtos', type=int, default=200)
+    parser.add_argument('--suporte', type=float, default=0.005)
+    parser.add_argument('--algoritmo', default='fpgrowth')
+    parser.add_argument('--processos', default='1,2,4,8', help='Lista de quantidades de processos')
+    parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+
+    produtos, precos = catalogo(args.produtos, seed=args.seed)
+    df = gerar_bloco(np.random.default_rng(args.seed), 0, args.transacoes, produtos, precos, args.transacoes // 5)
+    cesta = montar_cesta(df, 'IDTransacao', 'NomeProduto')
+    print(f"Cesta: {cesta.shape[0]} transações x {cesta.shape[1]} produtos, suporte {args.suporte}")
+
+    referencia = None
+    tempo_base = None
+    for processos in [int(p) for p in args.processos.split(',')]:
+        inicio = time.perf_counter()
+        resultado = minerar_itemsets(cesta, args.suporte, algorithm=args.algoritmo, processos=processos)
+        segundos = time.perf_counter() - inicio
+        obtido = dict(zip(resultado['itemsets'], resultado['support']))
+        if referencia is None:
+            referencia, tempo_base = obtido, segundos
+        iguais = obtido.keys() == referencia.keys() and all(np.isclose(obtido[k], referencia[k]) for k in obtido)
+        print(f"{processos:>3} processos: {segundos:8.2f}s  speedup {tempo_base / segundos:5.2f}x  "
+              f"{len(obtido)} itemsets  {'iguais' if iguais else 'DIFERENTES'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,36 @@
 # PROJETO MINI MERCADO INTELIGENTE
 # ================================
 
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from mlxtend.frequent_patterns import apriori, association_rules
-from itertools import combinations
+from agregacoes import VisoesAgregadas
+from instrumentacao import Perfilador
+from graficos import RenderizadorGraficos, barras, figura, histograma, pizza, texto
+from jaccard_app import top_pares_similares
 import warnings
 warnings.filterwarnings('ignore')
 
+ALGORITMO = 'apriori'  # ou 'fpgrowth': mesmos itemsets, menos memória em suportes baixos, outra ordem de linhas
+
+parser = argparse.ArgumentParser(description='Mini Mercado Inteligente - Vale do Ribeira')
+parser.add_argument('--perfil', metavar='SAIDA', help='Grava em JSON tempo, CPU, memória e contagens de cada etapa')
+parser.add_argument('--amostrar', action='store_true', help='Com --perfil, roda cProfile na mineração e na similaridade')
+parser.add_argument('--processos', type=int, default=None, help='Processos para a mineração de itemsets (SON)')
+parser.add_argument('--sem-cache', action='store_true', help='Ignora o cache de resultados e minera tudo de novo')
+parser.add_argument('--headless', action='store_true', help='Grava os gráficos em PNG (em paralelo) em vez de abrir janelas')
+parser.add_argument('--pasta-graficos', default='graficos', help='Pasta dos PNGs no modo --headless')
+args = parser.parse_args()
+
+cache = None
+if not args.sem_cache:
+    from cache_resultados import CacheResultados
+    cache = CacheResultados()
+
+perfil = Perfilador(ativo=args.perfil is not None, amostrar=args.amostrar)
+# matplotlib só é carregado ao desenhar; no modo headless, nos processos de renderização
+graficos = RenderizadorGraficos(headless=args.headless, pasta=args.pasta_graficos)
+
 print("🐛 MINI MERCADO INTELIGENTE - VALE DO RIBEIRA")
 print("=" * 60)
 
@@ -17,6 +38,7 @@ print("=" * 60)
 # =================================
 
 print("\n1. ETL - CARREGANDO E TRATANDO OS DADOS")
+perfil.etapa('etl')
 
 # Criando dataset simulado baseado no Vale do Ribeira
 np.random.seed(42)
@@ -64,23 +86,33 @@ df['ValorTotal'] = df['Quantidade'] * df['Preco']
 print(f"Dataset criado: {len(df)} registros, {df['IDCliente'].nunique()} clientes, {df['Produto'].nunique()} produtos")
 print("\nPrimeiras 5 transações:")
 print(df.head())
+perfil.contar(linhas=len(df), clientes=df['IDCliente'].nunique(), produtos=df['Produto'].nunique())
 
 # 2. ANÁLISE DESCRITIVA
 # ====================
 
 print("\n" + "=" * 60)
 print("2. ANÁLISE DESCRITIVA")
+perfil.etapa('analise_descritiva')
+
+# Visões agregadas por produto, cliente, transação e dia, calculadas numa única passada
+visoes = VisoesAgregadas(
+    {'produto': 'Produto', 'cliente': 'IDCliente', 'transacao': 'IDTransacao', 'dia': 'Data'},
+    ['Quantidade', 'ValorTotal']
+)
+visoes.atualizar(df)
+perfil.contar(linhas=visoes.linhas, transacoes=len(visoes.serie('transacao', 'Quantidade', 'contagem')))
 
 # Estatísticas básicas
 print("\nESTATÍSTICAS GERAIS:")
 print(f"Período: {df['Data'].min()} a {df['Data'].max()}")
 print(f"Faturamento total: R$ {df['ValorTotal'].sum():,.2f}")
-print(f"Ticket médio por transação: R$ {df.groupby('IDTransacao')['ValorTotal'].sum().mean():.2f}")
-print(f"Média de produtos por transação: {df.groupby('IDTransacao')['Produto'].count().mean():.1f}")
+print(f"Ticket médio por transação: R$ {visoes.serie('transacao', 'ValorTotal').mean():.2f}")
+print(f"Média de produtos por transação: {visoes.serie('transacao', 'Quantidade', 'contagem').mean():.1f}")
 
 # Top produtos
-top_produtos_qtd = df.groupby('Produto')['Quantidade'].sum().sort_values(ascending=False).head(10)
-top_produtos_valor = df.groupby('Produto')['ValorTotal'].sum().sort_values(ascending=False).head(10)
+top_produtos_qtd = visoes.serie('produto', 'Quantidade').sort_values(ascending=False).head(10)
+top_produtos_valor = visoes.serie('produto', 'ValorTotal').sort_values(ascending=False).head(10)
 
 print("\nTOP 10 PRODUTOS POR QUANTIDADE:")
 for i, (produto, qtd) in enumerate(top_produtos_qtd.items(), 1):
@@ -91,52 +123,42 @@ for i, (produto, valor) in enumerate(top_produtos_valor.items(), 1):
     print(f"{i}. {produto}: R$ {valor:,.2f}")
 
 # Visualizações
-plt.figure(figsize=(15, 10))
-
-plt.subplot(2, 2, 1)
-top_produtos_qtd.head(8).plot(kind='bar', color='green', alpha=0.7)
-plt.title('Top 8 Produtos Mais Vendidos (Quantidade)')
-plt.ylabel('Quantidade')
-plt.xticks(rotation=45)
-
-plt.subplot(2, 2, 2)
-top_produtos_valor.head(8).plot(kind='bar', color='blue', alpha=0.7)
-plt.title('Top 8 Produtos por Faturamento')
-plt.ylabel('Valor (R$)')
-plt.xticks(rotation=45)
-
-plt.subplot(2, 2, 3)
-df.groupby('IDTransacao')['ValorTotal'].sum().hist(bins=20, color='orange', alpha=0.7)
-plt.title('Distribuição do Valor das Transações')
-plt.xlabel('Valor (R$)')
-plt.ylabel('Frequência')
-
-plt.subplot(2, 2, 4)
-df.groupby('IDTransacao')['Produto'].count().hist(bins=15, color='purple', alpha=0.7)
-plt.title('Distribuição de Produtos por Transação')
-plt.xlabel('Número de Produtos')
-plt.ylabel('Frequência')
-
-plt.tight_layout()
-plt.show()
+graficos.enviar(figura('analise_descritiva.png', [
+    barras(top_produtos_qtd.head(8), cor='green', alpha=0.7,
+           titulo='Top 8 Produtos Mais Vendidos (Quantidade)', ylabel='Quantidade'),
+    barras(top_produtos_valor.head(8), cor='blue', alpha=0.7,
+           titulo='Top 8 Produtos por Faturamento', ylabel='Valor (R$)'),
+    histograma(visoes.serie('transacao', 'ValorTotal'), bins=20, cor='orange', alpha=0.7,
+               titulo='Distribuição do Valor das Transações', xlabel='Valor (R$)', ylabel='Frequência'),
+    histograma(visoes.serie('transacao', 'Quantidade', 'contagem'), bins=15, cor='purple', alpha=0.7,
+               titulo='Distribuição de Produtos por Transação', xlabel='Número de Produtos', ylabel='Frequência')
+], grade=(2, 2), tamanho=(15, 10)))
 
 # 3. MINERAÇÃO - REGRAS DE ASSOCIAÇÃO (APRIORI)
 # ============================================
 
 print("\n" + "=" * 60)
 print("3. MINERAÇÃO - REGRAS DE ASSOCIAÇÃO")
+perfil.etapa('mineracao', amostrar=True)
+
+from mineracao import minerar_itemsets, minerar_regras
+from matriz_cesta import codificar_cestas, montar_cesta
 
 # Criando matriz binária para Apriori
-transacoes_binarias = df.groupby(['IDTransacao', 'Produto'])['Quantidade'].sum().unstack(fill_value=0)
-transacoes_binarias = (transacoes_binarias > 0).astype(int)
+transacoes_binarias = montar_cesta(df, 'IDTransacao', 'Produto', 'Quantidade')
 
 print(f"Matriz de transações: {transacoes_binarias.shape}")
 
-# Aplicando algoritmo Apriori
-frequent_itemsets = apriori(transacoes_binarias, min_support=0.03, use_colnames=True)
-regras = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.5)
+# Aplicando algoritmo de mineração (Apriori ou FP-Growth)
+# com cache, uma nova execução sobre os mesmos dados não minera de novo
+frequent_itemsets = minerar_itemsets(transacoes_binarias, min_support=0.03, algorithm=ALGORITMO,
+                                     processos=args.processos, cache=cache)
+regras = minerar_regras(transacoes_binarias, min_support=0.03, min_confidence=0.5, algorithm=ALGORITMO,
+                        processos=args.processos, cache=cache)
 
 print(f"\nRegras encontradas: {len(regras)}")
+perfil.contar(transacoes=transacoes_binarias.shape[0], produtos=transacoes_binarias.shape[1],
+              itemsets=len(frequent_itemsets), regras=len(regras))
 
 if len(regras) > 0:
     # Top regras por lift
@@ -154,38 +176,21 @@ if len(regras) > 0:
 
 print("\n" + "=" * 60)
 print("4. SIMILARIDADE ENTRE CLIENTES")
+perfil.etapa('similaridade', amostrar=True)
 
-def indice_jaccard(set1, set2):
-    if not set1 or not set2:
-        return 0
-    intersecao = len(set1.intersection(set2))
-    uniao = len(set1.union(set2))
-    return intersecao / uniao if uniao > 0 else 0
-
-# Agrupando produtos por cliente
-compras_por_cliente = df.groupby('IDCliente')['Produto'].apply(set).to_dict()
-
-# Calculando similaridades
-clientes_ativos = list(compras_por_cliente.keys())[:20]  # Analisando apenas 20 clientes para exemplo
-similaridades = []
-
-for cliente1, cliente2 in combinations(clientes_ativos, 2):
-    similaridade = indice_jaccard(
-        compras_por_cliente[cliente1], 
-        compras_por_cliente[cliente2]
-    )
-    similaridades.append({
-        'cliente1': cliente1,
-        'cliente2': cliente2,
-        'similaridade': similaridade
-    })
-
-# Top similaridades
-similaridades_df = pd.DataFrame(similaridades)
-top_similaridades = similaridades_df.sort_values('similaridade', ascending=False).head(10)
+# Produtos por cliente como bitsets (um bit por produto), montados da matriz esparsa
+from cestas_bitset import CestasBitset
+
+matriz_clientes, clientes_ativos, produtos_clientes = codificar_cestas(df, 'IDCliente', 'Produto')
+cestas_clientes = CestasBitset.de_csr(matriz_clientes.indptr, matriz_clientes.indices,
+                                      list(clientes_ativos), list(produtos_clientes))
+
+# Top 10 pares entre todos os clientes: heap de tamanho fixo, sem guardar todos os pares
+similaridades_df = pd.DataFrame(top_pares_similares(cestas_clientes, k=10, cache=cache))
+perfil.contar(clientes=len(clientes_ativos), pares=len(similaridades_df))
 
 print("\nTOP 10 PARES DE CLIENTES MAIS SIMILARES:")
-for i, (idx, linha) in enumerate(top_similaridades.iterrows(), 1):
+for i, (idx, linha) in enumerate(similaridades_df.iterrows(), 1):
     print(f"{i}. {linha['cliente1']} & {linha['cliente2']}: {linha['similaridade']:.3f}")
 
 # 5. SISTEMA DE RECOMENDAÇÃO
@@ -193,38 +198,48 @@ for i, (idx, linha) in enumerate(top_similaridades.iterrows(), 1):
 
 print("\n" + "=" * 60)
 print("5. SISTEMA DE RECOMENDAÇÃO")
+perfil.etapa('recomendacao', amostrar=True)
+
+from indice_invertido import IndiceInvertido
 
-def recomendar_produtos(cliente_alvo, compras_por_cliente, top_n=5):
-    if cliente_alvo not in compras_por_cliente:
+def recomendar_produtos(cliente_alvo, cestas, top_n=5, indice=None):
+    if cliente_alvo not in cestas:
         return []
+    if indice is None:
+        indice = IndiceInvertido(cestas)
     
-    recomendacoes = {}
-    produtos_cliente = compras_por_cliente[cliente_alvo]
+    # Índice invertido: só visita clientes com produtos em comum e tamanho de cesta compatível
+    posicoes, similaridades = indice.vizinhos(cliente_alvo, limiar=0.3)
+    similares = similaridades > 0.3  # Considera apenas clientes com similaridade > 30%
+    posicoes, similaridades = posicoes[similares], similaridades[similares]
     
-    for outro_cliente, produtos in compras_por_cliente.items():
-        if outro_cliente != cliente_alvo:
-            similaridade = indice_jaccard(produtos_cliente, produtos)
-            
-            if similaridade > 0.3:  # Considera apenas clientes com similaridade > 30%
-                produtos_novos = produtos - produtos_cliente
-                for produto in produtos_novos:
-                    if produto not in recomendacoes:
-                        recomendacoes[produto] = {'frequencia': 0, 'similaridade_total': 0}
-                    recomendacoes[produto]['frequencia'] += 1
-                    recomendacoes[produto]['similaridade_total'] += similaridade
+    # frequência e similaridade somadas por produto, sem os que o cliente já comprou
+    frequencia = cestas.somar_por_produto(posicoes, np.ones(len(posicoes)))
+    similaridade_total = cestas.somar_por_produto(posicoes, similaridades)
+    frequencia[cestas.ids_de(cliente_alvo)] = 0
+    candidatos = np.flatnonzero(frequencia > 0)
     
     # Calculando score
-    for produto, dados in recomendacoes.items():
-        dados['score'] = dados['frequencia'] * dados['similaridade_total']
-    
-    return sorted(recomendacoes.items(), key=lambda x: x[1]['score'], reverse=True)[:top_n]
+    scores = frequencia[candidatos] * similaridade_total[candidatos]
+    melhores = candidatos[np.lexsort((candidatos, -scores))[:top_n]]
+    return [
+        (cestas.produtos[j], {
+            'frequencia': int(frequencia[j]),
+            'similaridade_total': float(similaridade_total[j]),
+            'score': float(frequencia[j] * similaridade_total[j])
+        })
+        for j in melhores.tolist()
+    ]
+
+# Índice invertido produto -> clientes, construído uma vez para todas as consultas
+indice_invertido = IndiceInvertido(cestas_clientes)
 
 # Exemplo de recomendação
 cliente_exemplo = clientes_ativos[0]
-recomendacoes = recomendar_produtos(cliente_exemplo, compras_por_cliente)
+recomendacoes = recomendar_produtos(cliente_exemplo, cestas_clientes, indice=indice_invertido)
 
 print(f"\nRECOMENDAÇÕES PARA CLIENTE {cliente_exemplo}:")
-print(f"Produtos atuais: {', '.join(compras_por_cliente[cliente_exemplo])}")
+print(f"Produtos atuais: {', '.join(cestas_clientes.produtos_de(cliente_exemplo))}")
 
 if recomendacoes:
     print("\nProdutos recomendados:")
@@ -232,54 +247,49 @@ if recomendacoes:
         print(f"- {produto} (score: {dados['score']:.3f})")
 else:
     print("Nenhuma recomendação encontrada.")
+perfil.contar(recomendacoes=len(recomendacoes))
+
+# Sugestões no caixa: regras indexadas por antecedente, aplicadas à cesta em andamento
+from sugestoes_caixa import IndiceRegras
+
+indice_regras = IndiceRegras.de_association_rules(regras)
+cestas = df.groupby('IDTransacao')['Produto'].apply(set)
+cesta_caixa = cestas.iloc[0]
+sugestoes = indice_regras.sugerir(cesta_caixa, n=3, por='lift')
+
+print(f"\nSUGESTÕES NO CAIXA PARA A CESTA: {', '.join(sorted(cesta_caixa))}")
+if sugestoes:
+    for produto, lift in sugestoes:
+        print(f"- {produto} (lift: {lift:.3f})")
+else:
+    print("Nenhuma regra se aplica a esta cesta.")
+
+# Reprocessamento de todas as cestas numa única chamada
+sugestoes_lote = indice_regras.sugerir_lote(cestas.tolist(), n=3)
+print(f"Cestas com alguma sugestão: {sugestoes_lote['cesta'].nunique()} de {len(cestas)}")
+perfil.contar(cestas=len(cestas), sugestoes=len(sugestoes_lote))
 
 # 6. VISUALIZAÇÃO FINAL - PAINEL RESUMO
 # =====================================
 
 print("\n" + "=" * 60)
 print("6. PAINEL FINAL - RESUMO DO MINI MERCADO INTELIGENTE")
+perfil.etapa('painel')
 
-plt.figure(figsize=(16, 12))
-
-# Gráfico 1: Top produtos
-plt.subplot(2, 3, 1)
-top_produtos_qtd.head(5).plot(kind='bar', color='lightgreen')
-plt.title('TOP 5 PRODUTOS MAIS VENDIDOS', fontweight='bold')
-plt.ylabel('Quantidade')
-plt.xticks(rotation=45)
-
-# Gráfico 2: Regras de associação (se existirem)
-plt.subplot(2, 3, 2)
+# Regras de associação (se existirem)
 if len(regras) > 0:
     top_5_regras = regras.nlargest(5, 'lift')
-    regras_labels = [f"{list(r.antecedents)[0]}\n→ {list(r.consequents)[0]}" 
-                    for _, r in top_5_regras.iterrows()]
-    plt.bar(range(len(top_5_regras)), top_5_regras['lift'], color='lightblue')
-    plt.title('TOP 5 REGRAS (por LIFT)', fontweight='bold')
-    plt.ylabel('Lift')
-    plt.xticks(range(len(top_5_regras)), regras_labels, rotation=45, ha='right')
+    top_5_regras.index = [f"{list(r.antecedents)[0]}\n→ {list(r.consequents)[0]}" for _, r in top_5_regras.iterrows()]
+    painel_regras = barras(top_5_regras['lift'], cor='lightblue', ha='right',
+                           titulo='TOP 5 REGRAS (por LIFT)', negrito=True, ylabel='Lift')
 else:
-    plt.text(0.5, 0.5, 'Nenhuma regra\nencontrada', ha='center', va='center', transform=plt.gca().transAxes)
-    plt.title('REGRAS DE ASSOCIAÇÃO', fontweight='bold')
+    painel_regras = texto('Nenhuma regra\nencontrada', titulo='REGRAS DE ASSOCIAÇÃO', negrito=True)
 
-# Gráfico 3: Similaridade entre clientes
-plt.subplot(2, 3, 3)
+# Similaridade entre clientes
 top_10_sim = similaridades_df.nlargest(10, 'similaridade')
-pares = [f"{row.cliente1}\n{row.cliente2}" for _, row in top_10_sim.iterrows()]
-plt.bar(range(len(top_10_sim)), top_10_sim['similaridade'], color='lightcoral')
-plt.title('TOP 10 CLIENTES SIMILARES', fontweight='bold')
-plt.ylabel('Similaridade Jaccard')
-plt.xticks(range(len(top_10_sim)), pares, rotation=45, ha='right', fontsize=8)
-
-# Gráfico 4: Distribuição de valores
-plt.subplot(2, 3, 4)
-df['ValorTotal'].hist(bins=30, color='gold', alpha=0.7)
-plt.title('DISTRIBUIÇÃO DOS VALORES', fontweight='bold')
-plt.xlabel('Valor (R$)')
-plt.ylabel('Frequência')
-
-# Gráfico 5: Produtos por categoria
-plt.subplot(2, 3, 5)
+top_10_sim.index = [f"{row.cliente1}\n{row.cliente2}" for _, row in top_10_sim.iterrows()]
+
+# Produtos por categoria
 categorias_count = {}
 for produto in df['Produto'].unique():
     for categoria, prods in categorias_produtos.items():
@@ -287,24 +297,29 @@ for produto in df['Produto'].unique():
             categorias_count[categoria] = categorias_count.get(categoria, 0) + 1
             break
 
-plt.pie(categorias_count.values(), labels=categorias_count.keys(), autopct='%1.1f%%', 
-        colors=['#ff9999','#66b3ff','#99ff99','#ffcc99','#ff99cc'])
-plt.title('DISTRIBUIÇÃO POR CATEGORIA', fontweight='bold')
-
-# Gráfico 6: Recomendações
-plt.subplot(2, 3, 6)
+# Recomendações
 if recomendacoes:
-    produtos_rec = [rec[0] for rec in recomendacoes]
-    scores_rec = [rec[1]['score'] for rec in recomendacoes]
-    plt.barh(produtos_rec, scores_rec, color='lightseagreen')
-    plt.title(f'RECOMENDAÇÕES - CLIENTE {cliente_exemplo}', fontweight='bold')
-    plt.xlabel('Score de Recomendação')
+    scores_rec = pd.Series({rec[0]: rec[1]['score'] for rec in recomendacoes})
+    painel_recomendacoes = barras(scores_rec, horizontal=True, cor='lightseagreen',
+                                  titulo=f'RECOMENDAÇÕES - CLIENTE {cliente_exemplo}', negrito=True,
+                                  xlabel='Score de Recomendação')
 else:
-    plt.text(0.5, 0.5, 'Nenhuma\nrecomendação', ha='center', va='center', transform=plt.gca().transAxes)
-    plt.title('RECOMENDAÇÕES', fontweight='bold')
-
-plt.tight_layout()
-plt.show()
+    painel_recomendacoes = texto('Nenhuma\nrecomendação', titulo='RECOMENDAÇÕES', negrito=True)
+
+graficos.enviar(figura('painel_final.png', [
+    barras(top_produtos_qtd.head(5), cor='lightgreen',
+           titulo='TOP 5 PRODUTOS MAIS VENDIDOS', negrito=True, ylabel='Quantidade'),
+    painel_regras,
+    barras(top_10_sim['similaridade'], cor='lightcoral', ha='right', fonte=8,
+           titulo='TOP 10 CLIENTES SIMILARES', negrito=True, ylabel='Similaridade Jaccard'),
+    histograma(df['ValorTotal'], bins=30, cor='gold', alpha=0.7,
+               titulo='DISTRIBUIÇÃO DOS VALORES', negrito=True, xlabel='Valor (R$)', ylabel='Frequência'),
+    pizza(categorias_count.keys(), categorias_count.values(), titulo='DISTRIBUIÇÃO POR CATEGORIA', negrito=True,
+          cores=['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc']),
+    painel_recomendacoes
+], grade=(2, 3), tamanho=(16, 12)))
+caminhos_graficos = graficos.concluir()
+perfil.encerrar()
 
 print("\n" + "=" * 60)
 print("🎯 INSIGHTS E RECOMENDAÇÕES PARA O VALE DO RIBEIRA:")
@@ -321,4 +336,12 @@ print("• Layout de loja que favoreça combinações frequentes")
 print("• Programas de fidelidade segmentados por perfil de compra")
 print("• Recomendações personalizadas no app e site")
 
-print(f"\n✅ PROJETO CONCLUÍDO: {len(df)} transações analisadas")
\ No newline at end of file
+print(f"\n✅ PROJETO CONCLUÍDO: {len(df)} transações analisadas")
+
+for caminho in caminhos_graficos:
+    print(f"Gráfico salvo em {caminho}")
+
+if args.perfil:
+    perfil.salvar(args.perfil)
+    perfil.imprimir()
+    print(f"\nPerfil de execução salvo em {args.perfil}")
@@ -0,0 +1,96 @@
+import time
+from multiprocessing import Pool
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from indice_invertido import IndiceInvertido
+from jaccard_app import recomendar_produtos
+
+# Recomendações para todos os clientes em um único job: o índice invertido é construído
+# uma vez e compartilhado com os processos do pool; cada processo recebe lotes de
+# clientes e os resultados são gravados em Parquet à medida que os lotes terminam.
+# Clientes e produtos são gravados como texto (str), qualquer que seja o tipo lido do
+# CSV (ids numéricos viram '1', '2', ...); ler_recomendacoes devolve as mesmas strings.
+
+ESQUEMA = pa.schema([
+    ('cliente', pa.string()),
+    ('posicao', pa.int16()),
+    ('produto', pa.string()),
+    ('score', pa.float64()),
+])
+
+_indice = None
+_top_n = None
+
+
+def _iniciar_processo(indice, top_n):
+    global _indice, _top_n
+    _indice = indice
+    _top_n = top_n
+
+
+def _recomendar_lote(clientes):
+    colunas = {'cliente': [], 'posicao': [], 'produto': [], 'score': []}
+    for cliente in clientes:
+        recomendacoes = recomendar_produtos(cliente, _indice.cestas, top_n=_top_n, indice=_indice)
+        for posicao, (produto, dados) in enumerate(recomendacoes, 1):
+            colunas['cliente'].append(str(cliente))
+            colunas['posicao'].append(posicao)
+            colunas['produto'].append(str(produto))
+            colunas['score'].append(dados['score'])
+    return len(clientes), colunas
+
+
+def recomendar_todos(cestas, saida, top_n=3, processos=None, tamanho_lote=500, indice=None):
+    if indice is None:
+        indice = IndiceInvertido(cestas)
+    clientes = cestas.clientes
+    lotes = [clientes[i:i + tamanho_lote] for i in range(0, len(clientes), tamanho_lote)]
+
+    inicio = time.perf_counter()
+    processados = 0
+    linhas = 0
+    with pq.ParquetWriter(saida, ESQUEMA) as escritor:
+        with Pool(processos, initializer=_iniciar_processo, initargs=(indice, top_n)) as pool:
+            for quantidade, colunas in pool.imap_unordered(_recomendar_lote, lotes):
+                if colunas['cliente']:
+                    escritor.write_table(pa.table(colunas, schema=ESQUEMA))
+                processados += quantidade
+                linhas += len(colunas['cliente'])
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'clientes': processados,
+        'recomendacoes': linhas,
+        'segundos': segundos,
+        'clientes_por_segundo': processados / segundos if segundos > 0 else float('inf'),
+    }
+
+
+def ler_recomendacoes(caminho):
+    # cliente e produto voltam como str, como foram gravados
+    return pq.read_table(caminho, schema=ESQUEMA).to_pandas()
+
+
+def conferir_ids_numericos():
+    # clientes e produtos com ids numéricos (como um compras.csv com 1, 2, 3) devem ser gravados
+    # e lidos de volta como texto
+    import os
+    import tempfile
+    from cestas_bitset import CestasBitset
+
+    cestas = CestasBitset.de_csr([0, 2, 4, 6], [0, 1, 0, 2, 1, 2], [1, 2, 3], [10, 20, 30])
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, 'recomendacoes.parquet')
+        resumo = recomendar_todos(cestas, saida, processos=1)
+        recomendacoes = ler_recomendacoes(saida)
+    esperado = {('1', '30'), ('2', '20'), ('3', '10')}
+    obtido = set(zip(recomendacoes['cliente'], recomendacoes['produto']))
+    if resumo['recomendacoes'] != 3 or obtido != esperado:
+        raise AssertionError(f"Recomendações com ids numéricos: esperado {esperado}, obtido {obtido}")
+    print("Ids numéricos: gravados e lidos como texto")
+
+
+if __name__ == "__main__":
+    conferir_ids_numericos()
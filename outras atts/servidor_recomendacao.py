@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from cache_colunar import carregar_cestas_bitset
+from indice_invertido import IndiceInvertido
+from jaccard_app import indice_jaccard, recomendar_produtos, top_pares_similares
+
+# Servidor HTTP local para sugestões no caixa: os dados de compra, o índice invertido e
+# os pares mais similares são carregados uma única vez e mantidos em memória. Uma thread
+# observa o CSV de origem e recarrega tudo quando ele muda; as consultas continuam sendo
+# atendidas pelo estado anterior até o novo estar pronto.
+
+MAX_PARES = 100
+# faixas do histograma de latências: 1 µs a 100 s, 50 por década (erro relativo de ~5% nos percentis)
+LIMITES_LATENCIA = np.logspace(-6, 2, 8 * 50 + 1)
+
+
+class EstadoRecomendacao:
+    def __init__(self, caminho, col_cliente='cliente', col_produto='produto'):
+        self.caminho = caminho
+        estado = os.stat(caminho)
+        self.versao = (estado.st_size, estado.st_mtime_ns)
+        self.cestas = carregar_cestas_bitset(caminho, col_cliente, col_produto)
+        self.indice = IndiceInvertido(self.cestas)
+        self.top_pares = top_pares_similares(self.cestas, MAX_PARES, indice=self.indice)
+
+
+class Metricas:
+    # histograma fixo por rota: memória e custo do resumo não crescem com o número de requisições
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contagens = defaultdict(int)
+        self._histogramas = defaultdict(lambda: np.zeros(len(LIMITES_LATENCIA) + 1, dtype=np.int64))
+
+    def registrar(self, rota, segundos):
+        faixa = int(np.searchsorted(LIMITES_LATENCIA, segundos))
+        with self._trava:
+            self._contagens[rota] += 1
+            self._histogramas[rota][faixa] += 1
+
+    @staticmethod
+    def _percentil(histograma, q):
+        # limite superior da faixa onde cai o q-ésimo percentil
+        faixa = int(np.searchsorted(np.cumsum(histograma), q / 100 * histograma.sum()))
+        return float(LIMITES_LATENCIA[min(faixa, len(LIMITES_LATENCIA) - 1)])
+
+    def resumo(self):
+        with self._trava:
+            resumo = {}
+            for rota, contagem in self._contagens.items():
+                histograma = self._histogramas[rota]
+                resumo[rota] = {
+                    'requisicoes': contagem,
+                    'p50_ms': self._percentil(histograma, 50) * 1000,
+                    'p99_ms': self._percentil(histograma, 99) * 1000
+                }
+            return resumo
+
+
+class ServidorRecomendacao(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, caminho, intervalo_recarga=2.0):
+        super().__init__(endereco, ManipuladorRecomendacao)
+        self.estado = EstadoRecomendacao(caminho)
+        self.metricas = Metricas()
+        self.recargas = 0
+        self._intervalo = intervalo_recarga
+        threading.Thread(target=self._observar_arquivo, daemon=True).start()
+
+    def _observar_arquivo(self):
+        while True:
+            time.sleep(self._intervalo)
+            try:
+                estado = os.stat(self.estado.caminho)
+                if (estado.st_size, estado.st_mtime_ns) != self.estado.versao:
+                    # troca de referência atômica: requisições em andamento usam o estado antigo
+                    self.estado = EstadoRecomendacao(self.estado.caminho)
+                    self.recargas += 1
+            except Exception as erro:
+                # qualquer falha (arquivo sumiu, coluna faltando, CSV malformado, falta de memória)
+                # mantém o estado anterior e a observação continua no próximo intervalo
+                print(f"Falha ao recarregar {self.estado.caminho}: {type(erro).__name__}: {erro}")
+
+
+class ManipuladorRecomendacao(BaseHTTPRequestHandler):
+    def do_GET(self):
+        inicio = time.perf_counter()
+        url = urlparse(self.path)
+        parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+        rota = url.path.rstrip('/') or '/'
+        rotas = {
+            '/similaridade': self._similaridade,
+            '/top_pares': self._top_pares,
+            '/recomendar': self._recomendar,
+            '/metricas': self._metricas
+        }
+        if rota not in rotas:
+            self._responder(404, {'erro': f'Rota não encontrada: {rota}'})
+            return
+        try:
+            status, corpo = rotas[rota](self.server.estado, parametros)
+        except (KeyError, ValueError) as erro:
+            status, corpo = 400, {'erro': f'Parâmetro inválido: {erro}'}
+        self._responder(status, corpo)
+        if rota != '/metricas':
+            self.server.metricas.registrar(rota, time.perf_counter() - inicio)
+
+    def _similaridade(self, estado, parametros):
+        cliente1, cliente2 = parametros['cliente1'], parametros['cliente2']
+        if cliente1 not in estado.cestas or cliente2 not in estado.cestas:
+            return 404, {'erro': 'Cliente(s) não encontrado(s)!'}
+        similaridade = indice_jaccard(estado.cestas.bitset(cliente1), estado.cestas.bitset(cliente2))
+        comum = sorted(estado.cestas.produtos_em_comum(cliente1, cliente2))
+        return 200, {'cliente1': cliente1, 'cliente2': cliente2, 'similaridade': similaridade, 'produtos_em_comum': comum}
+
+    def _top_pares(self, estado, parametros):
+        k = min(int(parametros.get('k', 3)), MAX_PARES)
+        return 200, {'pares': estado.top_pares[:k]}
+
+    def _recomendar(self, estado, parametros):
+        cliente = parametros['cliente']
+        if cliente not in estado.cestas:
+            return 404, {'erro': 'Cliente não encontrado!'}
+        recomendacoes = recomendar_produtos(cliente, estado.cestas, top_n=int(parametros.get('n', 3)), indice=estado.indice)
+        return 200, {'cliente': cliente, 'recomendacoes': [{'produto': p, 'score': d['score']} for p, d in recomendacoes]}
+
+    def _metricas(self, estado, parametros):
+        return 200, {'clientes': len(estado.cestas), 'recargas': self.server.recargas, 'rotas': self.server.metricas.resumo()}
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local de similaridade e recomendações')
+    parser.add_argument('--arquivo', default='compras.csv', help='CSV de compras (colunas cliente, produto)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--intervalo-recarga', type=float, default=2.0, help='Segundos entre verificações do arquivo')
+
+    args = parser.parse_args()
+
+    servidor = ServidorRecomendacao((args.host, args.porta), args.arquivo, args.intervalo_recarga)
+    print(f"Servidor em http://{args.host}:{args.porta} ({len(servidor.estado.cestas)} clientes carregados)")
+    print("Rotas: /similaridade?cliente1=A&cliente2=B, /top_pares?k=3, /recomendar?cliente=A&n=3, /metricas")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Sugestões no caixa a partir de regras de associação. Os produtos viram ids inteiros e
+# os antecedentes (tuplas ordenadas de ids) formam uma trie; para uma cesta, só são
+# visitados os caminhos da trie cujos itens estão todos na cesta, então o custo depende
+# das regras que casam e não do total de regras. Cada consequente fora da cesta recebe a
+# melhor métrica (lift ou confiança) entre as regras que o sugerem.
+# sugerir_lote() casa milhares de cestas de uma vez com um produto esparso cestas x
+# antecedentes: a regra vale para a cesta quando a interseção tem o tamanho do antecedente.
+
+METRICAS = ('lift', 'confidence', 'support')
+
+
+class _No:
+    __slots__ = ('filhos', 'regras')
+
+    def __init__(self):
+        self.filhos = {}
+        self.regras = []
+
+
+class IndiceRegras:
+    def __init__(self, antecedentes, consequentes, metricas):
+        # antecedentes/consequentes: listas de coleções de produtos; metricas: nome -> valores por regra
+        produtos = sorted({p for itens in list(antecedentes) + list(consequentes) for p in itens})
+        self.produtos = produtos
+        self.ids = {produto: i for i, produto in enumerate(produtos)}
+        self.antecedentes = [tuple(sorted(self.ids[p] for p in itens)) for itens in antecedentes]
+        self.consequentes = [tuple(sorted(self.ids[p] for p in itens)) for itens in consequentes]
+        self.metricas = {nome: np.asarray(valores, dtype=np.float64) for nome, valores in metricas.items()}
+
+        self.raiz = _No()
+        for r, antecedente in enumerate(self.antecedentes):
+            no = self.raiz
+            for item in antecedente:
+                no = no.filhos.setdefault(item, _No())
+            no.regras.append(r)
+
+    @classmethod
+    def de_association_rules(cls, regras):
+        return cls(
+            regras['antecedents'].tolist(), regras['consequents'].tolist(),
+            {nome: regras[nome].to_numpy() for nome in METRICAS if nome in regras}
+        )
+
+    @classmethod
+    def de_tabela_regras(cls, regras):
+        # RuleTable de generate_rules (notebook): antecedent(r)/consequent(r) + arrays de métricas
+        return cls(
+            [regras.antecedent(r) for r in range(len(regras))],
+            [regras.consequent(r) for r in range(len(regras))],
+            {nome: getattr(regras, nome) for nome in METRICAS}
+        )
+
+    def __len__(self):
+        return len(self.antecedentes)
+
+    def _regras_da_cesta(self, itens):
+        # itens: ids ordenados; percorre só subconjuntos da cesta que existem na trie
+        encontradas = []
+        pilha = [(self.raiz, 0)]
+        while pilha:
+            no, inicio = pilha.pop()
+            encontradas.extend(no.regras)
+            for posicao in range(inicio, len(itens)):
+                filho = no.filhos.get(itens[posicao])
+                if filho is not None:
+                    pilha.append((filho, posicao + 1))
+        return encontradas
+
+    def sugerir(self, cesta, n=3, por='lift'):
+        if por not in self.metricas:
+            raise ValueError(f"Métrica não suportada: {por}")
+        itens = sorted(self.ids[p] for p in cesta if p in self.ids)
+        na_cesta = set(itens)
+        valores = self.metricas[por]
+        melhores = {}
+        for r in self._regras_da_cesta(itens):
+            for item in self.consequentes[r]:
+                if item not in na_cesta and valores[r] > melhores.get(item, -np.inf):
+                    melhores[item] = valores[r]
+        topo = heapq.nsmallest(n, melhores.items(), key=lambda par: (-par[1], par[0]))
+        return [(self.produtos[item], float(valor)) for item, valor in topo]
+
+    def _matriz(self, conjuntos):
+        from scipy import sparse
+        linhas = np.repeat(np.arange(len(conjuntos)), [len(c) for c in conjuntos])
+        colunas = np.fromiter((i for c in conjuntos for i in c), dtype=np.int64, count=len(linhas))
+        dados = np.ones(len(linhas), dtype=np.int32)
+        return sparse.csr_matrix((dados, (linhas, colunas)), shape=(len(conjuntos), len(self.produtos)))
+
+    def sugerir_lote(self, cestas, n=3, por='lift'):
+        # cestas: lista de coleções de produtos; devolve cesta (posição na lista), posicao, produto, valor
+        if por not in self.metricas:
+            raise ValueError(f"Métrica não suportada: {por}")
+        colunas = ['cesta', 'posicao', 'produto', 'valor']
+        cestas_ids = [sorted({self.ids[p] for p in cesta if p in self.ids}) for cesta in cestas]
+        if len(self) == 0 or not cestas_ids:
+            return pd.DataFrame(columns=colunas)
+
+        matriz_cestas = self._matriz(cestas_ids)
+        antecedentes = self._matriz(self.antecedentes)
+        tamanhos = np.diff(antecedentes.indptr)
+        # |cesta ∩ antecedente| == |antecedente|  <=>  a regra casa com a cesta
+        casamentos = (matriz_cestas @ antecedentes.T).tocoo()
+        cheias = casamentos.data == tamanhos[casamentos.col]
+        cesta_idx, regra_idx = casamentos.row[cheias].astype(np.int64), casamentos.col[cheias]
+        if (tamanhos == 0).any():
+            vazias = np.flatnonzero(tamanhos == 0)
+            cesta_idx = np.concatenate([cesta_idx, np.repeat(np.arange(len(cestas_ids)), len(vazias))])
+            regra_idx = np.concatenate([regra_idx, np.tile(vazias, len(cestas_ids))])
+
+        # expande cada (cesta, regra) nos itens do consequente e remove os que já estão na cesta
+        consequentes = self._matriz(self.consequentes)
+        por_regra = np.diff(consequentes.indptr)[regra_idx]
+        cesta_idx = np.repeat(cesta_idx, por_regra)
+        inicio = np.repeat(consequentes.indptr[regra_idx], por_regra)
+        deslocamento = np.arange(len(inicio)) - np.repeat(np.cumsum(por_regra) - por_regra, por_regra)
+        item_idx = consequentes.indices[inicio + deslocamento]
+        valor = np.repeat(self.metricas[por][regra_idx], por_regra)
+        na_cesta = matriz_cestas.tocoo()
+        fora = ~np.isin(cesta_idx * len(self.produtos) + item_idx,
+                        na_cesta.row.astype(np.int64) * len(self.produtos) + na_cesta.col)
+        cesta_idx, item_idx, valor = cesta_idx[fora], item_idx[fora], valor[fora]
+
+        # melhor valor por (cesta, item) e os n primeiros de cada cesta
+        ordem = np.lexsort((item_idx, -valor, cesta_idx))
+        cesta_idx, item_idx, valor = cesta_idx[ordem], item_idx[ordem], valor[ordem]
+        chave = cesta_idx * len(self.produtos) + item_idx
+        _, primeiro = np.unique(chave, return_index=True)
+        primeiro = np.sort(primeiro)
+        cesta_idx, item_idx, valor = cesta_idx[primeiro], item_idx[primeiro], valor[primeiro]
+        posicao = np.arange(len(cesta_idx)) - np.searchsorted(cesta_idx, cesta_idx, side='left')
+        manter = posicao < n
+
+        return pd.DataFrame({
+            'cesta': cesta_idx[manter],
+            'posicao': posicao[manter] + 1,
+            'produto': [self.produtos[i] for i in item_idx[manter].tolist()],
+            'valor': valor[manter]
+        }, columns=colunas)
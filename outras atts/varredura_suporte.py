@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from mineracao import minerar_itemsets, minerar_regras
+
+# Varredura de limiares: o suporte é anti-monotônico, então minerar uma vez no menor
+# suporte (e gerar as regras na menor confiança) já contém a resposta para todos os
+# limiares maiores. Itemsets e regras ficam ordenados por suporte; cada par
+# (suporte, confiança) é respondido com searchsorted + filtro, sem minerar de novo.
+
+
+class VarreduraSuporte:
+    def __init__(self, frequentes, regras):
+        self._itemsets = frequentes.sort_values('support', kind='stable').reset_index(drop=True)
+        self._suportes_itemsets = self._itemsets['support'].to_numpy()
+        self._regras = regras.sort_values('support', kind='stable').reset_index(drop=True)
+        self._suportes_regras = self._regras['support'].to_numpy()
+        self._confiancas_regras = self._regras['confidence'].to_numpy()
+
+    def _inicio(self, suportes, min_support):
+        return np.searchsorted(suportes, min_support, side='left')
+
+    def itemsets(self, min_support):
+        inicio = self._inicio(self._suportes_itemsets, min_support)
+        return self._itemsets.iloc[inicio:][::-1].reset_index(drop=True)
+
+    def regras(self, min_support, min_confidence):
+        inicio = self._inicio(self._suportes_regras, min_support)
+        mascara = self._confiancas_regras[inicio:] >= min_confidence
+        return self._regras.iloc[inicio:][mascara][::-1].reset_index(drop=True)
+
+    def contagens(self, min_support, min_confidence):
+        inicio_itemsets = self._inicio(self._suportes_itemsets, min_support)
+        inicio_regras = self._inicio(self._suportes_regras, min_support)
+        return (
+            len(self._suportes_itemsets) - inicio_itemsets,
+            int(np.count_nonzero(self._confiancas_regras[inicio_regras:] >= min_confidence))
+        )
+
+    def relatorio(self, suportes, confiancas):
+        linhas = []
+        for min_support in sorted(suportes, reverse=True):
+            for min_confidence in sorted(confiancas, reverse=True):
+                n_itemsets, n_regras = self.contagens(min_support, min_confidence)
+                linhas.append({
+                    'min_support': min_support,
+                    'min_confidence': min_confidence,
+                    'itemsets': n_itemsets,
+                    'regras': n_regras
+                })
+        return pd.DataFrame(linhas)
+
+
+def varrer_limiares(cesta, suportes, confiancas, algorithm='apriori', processos=None, cache=None):
+    frequentes = minerar_itemsets(cesta, min(suportes), algorithm=algorithm, processos=processos, cache=cache)
+    regras = minerar_regras(cesta, min(suportes), min(confiancas), algorithm=algorithm,
+                            processos=processos, cache=cache)
+    return VarreduraSuporte(frequentes, regras)